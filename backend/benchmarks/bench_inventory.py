@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Concurrency benchmark: flash-sale checkouts against one product
+
+Sets a fixed stock on one product, then fires more concurrent single-unit
+reservations than there are units, for each shard count. Checks that
+exactly `stock` reservations succeed and that no counter goes negative.
+
+Usage:
+    cd backend && python benchmarks/bench_inventory.py --stock 1000 --buyers 5000 --shards 1 8 32
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from indexes import ensure_indexes
+from inventory import Inventory, OutOfStockError
+
+PRODUCT_ID = "flash-sale-product"
+
+
+async def run(db, stock, buyers, shards, concurrency):
+    await db.inventory.delete_many({})
+    await db.reservations.delete_many({})
+    inventory = Inventory(db.inventory, db.reservations)
+    await inventory.set_stock(PRODUCT_ID, stock, shards)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    sold = 0
+    rejected = 0
+
+    async def buyer(i):
+        nonlocal sold, rejected
+        async with semaphore:
+            try:
+                reservation = await inventory.reserve(f"user-{i}", [(PRODUCT_ID, 1)])
+                await inventory.commit(reservation["id"], f"user-{i}", f"order-{i}")
+                sold += 1
+            except OutOfStockError:
+                rejected += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(buyer(i) for i in range(buyers)))
+    elapsed = time.perf_counter() - start
+
+    remaining = await inventory.available(PRODUCT_ID)
+    negative = await db.inventory.count_documents({"available": {"$lt": 0}})
+    oversold = sold - stock if sold > stock else 0
+    ok = oversold == 0 and negative == 0 and sold + remaining == stock
+    print(f"{shards:>6}{sold:>7}{rejected:>9}{remaining:>10}{oversold:>9}{buyers / elapsed:>10.0f}  {'OK' if ok else 'FAIL'}")
+    return ok
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stock", type=int, default=1000)
+    parser.add_argument("--buyers", type=int, default=5000)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--mongo-url", default=os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default="bench_inventory")
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(args.mongo_url, maxPoolSize=args.concurrency)
+    db = client[args.db]
+    await ensure_indexes(db)
+
+    print(f"{'shards':>6}{'sold':>7}{'rejected':>9}{'remaining':>10}{'oversold':>9}{'req/s':>10}")
+    results = [await run(db, args.stock, args.buyers, shards, args.concurrency) for shards in args.shards]
+
+    await client.drop_database(args.db)
+    client.close()
+    raise SystemExit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
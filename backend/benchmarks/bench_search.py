@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark: regex product search vs the in-process inverted index
+
+Loads a synthetic catalog (seed products with varied names) into a scratch
+database on a local mongod and times both search paths for a fixed set of
+queries.
+
+Usage:
+    cd backend && python benchmarks/bench_search.py --products 50000
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from search import SearchIndex, build_index
+from seed_data import products_data
+
+QUERIES = ["iphone", "samsung galaxy", "shoes", "sofa", "habits", "air", "wash", "psychology of money"]
+ADJECTIVES = ["Classic", "Premium", "Ultra", "Smart", "Compact", "Deluxe", "Eco", "Pro"]
+
+
+def make_catalog(count):
+    for i in range(count):
+        template = products_data[i % len(products_data)]
+        product = dict(template)
+        product["name"] = f"{ADJECTIVES[i % len(ADJECTIVES)]} {template['name']} {i}"
+        yield product
+
+
+async def time_async(fn, rounds):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--mongo-url", default=os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default="bench_search")
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(args.mongo_url)
+    db = client[args.db]
+    collection = db.products
+    await collection.drop()
+
+    print(f"Loading {args.products} products...")
+    batch = []
+    for product in make_catalog(args.products):
+        batch.append(product)
+        if len(batch) == 5000:
+            await collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        await collection.insert_many(batch, ordered=False)
+
+    index = SearchIndex()
+    start = time.perf_counter()
+    await build_index(collection, index)
+    print(f"Index built in {(time.perf_counter() - start) * 1000:.0f} ms\n")
+
+    print(f"{'query':<22}{'regex ms':>10}{'index ms':>10}{'speedup':>9}{'hits':>7}")
+    for q in QUERIES:
+        async def regex_search():
+            query = {
+                "$or": [
+                    {"name": {"$regex": q, "$options": "i"}},
+                    {"category": {"$regex": q, "$options": "i"}},
+                    {"description": {"$regex": q, "$options": "i"}},
+                ]
+            }
+            return await collection.find(query).to_list(100)
+
+        async def index_search():
+            keys = index.search(q, limit=100)
+            if not keys:
+                return []
+            return await collection.find({"_id": {"$in": [ObjectId(k) for k in keys]}}).to_list(len(keys))
+
+        regex_ms = await time_async(regex_search, args.rounds)
+        index_ms = await time_async(index_search, args.rounds)
+        hits = len(index.search(q, limit=100))
+        print(f"{q:<22}{regex_ms:>10.2f}{index_ms:>10.2f}{regex_ms / index_ms:>8.1f}x{hits:>7}")
+
+    await client.drop_database(args.db)
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark: legacy list serialization vs projection + orjson
+
+The legacy path is what list endpoints used to do: a recursive
+convert_objectid_to_str walk, response_model validation, then
+jsonable_encoder and json.dumps. The new path maps `_id` at the top level
+only and renders projected documents with orjson.
+
+Usage:
+    cd backend && python benchmarks/bench_serialization.py --size 100
+"""
+
+import argparse
+import copy
+import json
+import sys
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from models import Product, Order
+from seed_data import products_data
+from serialization import dumps, products_out
+
+
+def legacy_convert(doc):
+    """The recursive walk list endpoints ran before projections"""
+    if isinstance(doc, list):
+        return [legacy_convert(item) for item in doc]
+    if isinstance(doc, dict):
+        if "_id" in doc and "id" not in doc:
+            doc["id"] = str(doc["_id"])
+        doc.pop("_id", None)
+        for key, value in doc.items():
+            if isinstance(value, ObjectId):
+                doc[key] = str(value)
+            elif isinstance(value, (dict, list)):
+                doc[key] = legacy_convert(value)
+    return doc
+
+
+def make_products(size):
+    return [dict(products_data[i % len(products_data)], _id=ObjectId()) for i in range(size)]
+
+
+def make_orders(size):
+    orders = []
+    for i in range(size):
+        items = [
+            {"productId": str(ObjectId()), "name": p["name"], "image": p["image"], "price": p["price"], "quantity": 1}
+            for p in products_data[i % 5:i % 5 + 3]
+        ]
+        orders.append({
+            "id": str(uuid.uuid4()),
+            "userId": "bench-user",
+            "items": items,
+            "totalAmount": sum(item["price"] for item in items),
+            "shippingAddress": {
+                "fullName": "Bench User", "phone": "9999999999", "address": "1 Main St",
+                "city": "Bengaluru", "state": "KA", "pincode": "560001",
+            },
+            "paymentMethod": "cod",
+            "status": "pending",
+            "createdAt": datetime.utcnow(),
+            "updatedAt": datetime.utcnow(),
+        })
+    return orders
+
+
+def time_per_call(fn, docs, number, repeat=3):
+    """Best-of-repeat milliseconds per call of fn on a fresh copy of docs.
+
+    legacy_convert mutates its input, and real requests start from fresh
+    documents from Mongo, so each call gets its own deep copy. The copies
+    are made before the clock starts; only fn itself is timed.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        payloads = [copy.deepcopy(docs) for _ in range(number)]
+        start = time.perf_counter()
+        for payload in payloads:
+            fn(payload)
+        best = min(best, time.perf_counter() - start)
+    return best / number * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=100, help="documents per payload")
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    cases = [
+        ("product list", make_products(args.size), TypeAdapter(List[Product]), products_out),
+        ("order list", make_orders(args.size), TypeAdapter(List[Order]), lambda docs: docs),
+    ]
+
+    print(f"{'payload':<14}{'legacy ms':>11}{'fast ms':>9}{'speedup':>9}")
+    for name, docs, adapter, shape in cases:
+        def legacy(payload):
+            converted = legacy_convert(payload)
+            return json.dumps(jsonable_encoder(adapter.validate_python(converted))).encode()
+
+        def fast(payload):
+            return dumps(shape(payload))
+
+        legacy_ms = time_per_call(legacy, docs, args.number)
+        fast_ms = time_per_call(fast, docs, args.number)
+        print(f"{name:<14}{legacy_ms:>11.3f}{fast_ms:>9.3f}{legacy_ms / fast_ms:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
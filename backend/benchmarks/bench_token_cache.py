@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: per-request auth cost with and without the decoded-JWT cache
+
+/api/orders and /api/auth/me both authenticate through get_current_user,
+so its cost is the per-request saving on those routes.
+
+Usage:
+    cd backend && python benchmarks/bench_token_cache.py --iterations 20000
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.security import HTTPAuthorizationCredentials
+
+import auth
+
+
+async def time_per_call(credentials, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await auth.get_current_user(credentials)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    token = auth.create_access_token(data={"sub": "bench-user"})
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    cache_size = auth.token_cache.max_size
+    auth.token_cache.max_size = 0
+    auth.token_cache.clear()
+    uncached_us = await time_per_call(credentials, args.iterations)
+
+    auth.token_cache.max_size = cache_size or 10000
+    auth.token_cache.clear()
+    cached_us = await time_per_call(credentials, args.iterations)
+
+    print(f"get_current_user without cache: {uncached_us:8.2f} us/request")
+    print(f"get_current_user with cache:    {cached_us:8.2f} us/request")
+    print(f"saved per /api/orders or /api/auth/me request: {uncached_us - cached_us:.2f} us "
+          f"({uncached_us / cached_us:.1f}x)")
+    print(f"cache stats: {auth.token_cache.stats()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
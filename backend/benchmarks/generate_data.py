@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Synthetic catalog, user and order generator for scale testing
+
+Expands the handwritten products_data/categories_data templates into
+millions of realistic documents and bulk-loads them into a local mongod.
+Output is deterministic: document N of each kind depends only on --seed
+and N, so any worker count or chunk size produces the same database.
+
+Work is split into chunks inserted in parallel by a process pool, each
+worker with its own pymongo client and unordered insert_many batches.
+With --drop the collections are emptied first and indexes are built once
+after the load, which is much faster than maintaining them per insert.
+
+Usage:
+    cd backend && python benchmarks/generate_data.py --products 1000000 --users 100000 --orders 1000000 --drop
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from multiprocessing import Pool
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pymongo import MongoClient
+from pymongo.errors import BulkWriteError
+
+from seed_data import categories_data, products_data
+from importer import stable_product_id
+
+# Variation applied to template products
+VARIANTS = ["", "Pro", "Plus", "Lite", "Max", "Mini", "Neo", "Prime", "Ultra", "Edge", "Classic", "Sport"]
+COLORS = ["Black", "White", "Blue", "Red", "Green", "Silver", "Grey", "Gold", "Pink", "Navy"]
+FIRST_NAMES = ["Aarav", "Vivaan", "Aditya", "Ananya", "Diya", "Isha", "Kabir", "Meera", "Rohan", "Saanvi", "Arjun", "Priya"]
+LAST_NAMES = ["Sharma", "Verma", "Iyer", "Reddy", "Nair", "Gupta", "Patel", "Singh", "Khan", "Das", "Menon", "Rao"]
+CITIES = [
+    ("Bengaluru", "Karnataka", "560"), ("Mumbai", "Maharashtra", "400"), ("Delhi", "Delhi", "110"),
+    ("Chennai", "Tamil Nadu", "600"), ("Hyderabad", "Telangana", "500"), ("Kolkata", "West Bengal", "700"),
+]
+ORDER_STATUSES = ["pending", "confirmed", "shipped", "delivered", "delivered", "delivered", "cancelled"]
+
+# Fixed reference time so generated timestamps do not depend on when the script runs
+EPOCH = datetime(2026, 1, 1)
+HISTORY_DAYS = 730
+
+# Every generated user can log in with this password
+PASSWORD = "password123"
+
+_db = None
+
+
+def _rng(seed: int, kind: str, n: int) -> random.Random:
+    return random.Random(f"{seed}:{kind}:{n}")
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _timestamp(rng: random.Random) -> datetime:
+    return EPOCH - timedelta(seconds=rng.randrange(HISTORY_DAYS * 86400))
+
+
+def make_product(seed: int, n: int) -> dict:
+    """Product N: a template with a new model name, price, rating and flags"""
+    rng = _rng(seed, "product", n)
+    template = products_data[rng.randrange(len(products_data))]
+    variant = rng.choice(VARIANTS)
+    color = rng.choice(COLORS)
+    name = " ".join(part for part in (template["name"], variant, f"{color} {n:x}".upper()) if part)
+
+    price = max(99, int(template["price"] * rng.uniform(0.5, 1.6)))
+    discount = rng.choice([0, 0, 5, 10, 15, 20, 25, 30, 40, 50, 60, 70])
+    rating = round(min(5.0, max(1.0, rng.gauss(4.1, 0.45))), 1)
+    product = {
+        "name": name,
+        "category": template["category"],
+        "categoryId": template["categoryId"],
+        "price": price,
+        "originalPrice": int(price / (1 - discount / 100)) if discount else price,
+        "discount": discount,
+        "rating": rating,
+        "reviews": int(rng.lognormvariate(5, 1.5)),
+        "image": template["image"],
+        "images": list(template.get("images", [])),
+        "description": f"{template['description']} Available in {color}.",
+        "specifications": dict(template.get("specifications", {}), Colour=color),
+        "inStock": rng.random() < 0.95,
+        "fastDelivery": rng.random() < 0.4,
+        "createdAt": _timestamp(rng),
+    }
+    product["id"] = stable_product_id(product)
+    return product
+
+
+def make_user(seed: int, n: int, password_hash: str) -> dict:
+    rng = _rng(seed, "user", n)
+    return {
+        "id": _uuid(rng),
+        "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        "email": f"user{n}@example.com",
+        "phone": f"9{rng.randrange(10 ** 9):09d}",
+        "password": password_hash,
+        "role": "user",
+        "createdAt": _timestamp(rng),
+    }
+
+
+def make_order(seed: int, n: int, product_count: int, user_count: int) -> dict:
+    rng = _rng(seed, "order", n)
+    user = make_user(seed, rng.randrange(user_count), "")
+    items = []
+    for _ in range(rng.choice([1, 1, 1, 2, 2, 3, 4])):
+        product = make_product(seed, rng.randrange(product_count))
+        items.append({
+            "productId": product["id"],
+            "name": product["name"],
+            "image": product["image"],
+            "price": product["price"],
+            "quantity": rng.choice([1, 1, 1, 2, 3]),
+        })
+    city, state, pin_prefix = rng.choice(CITIES)
+    created = _timestamp(rng)
+    payment_method = rng.choice(["razorpay", "cod"])
+    return {
+        "id": _uuid(rng),
+        "userId": user["id"],
+        "items": items,
+        "totalAmount": float(sum(item["price"] * item["quantity"] for item in items)),
+        "shippingAddress": {
+            "fullName": user["name"],
+            "phone": user["phone"],
+            "address": f"{rng.randrange(1, 999)}, {rng.choice(['MG Road', 'Park Street', 'Ring Road', 'Main Street'])}",
+            "city": city,
+            "state": state,
+            "pincode": f"{pin_prefix}{rng.randrange(1000):03d}",
+        },
+        "paymentMethod": payment_method,
+        "paymentId": f"pay_{_uuid(rng).replace('-', '')[:14]}" if payment_method == "razorpay" else None,
+        "status": rng.choice(ORDER_STATUSES),
+        "createdAt": created,
+        "updatedAt": created + timedelta(hours=rng.randrange(0, 240)),
+    }
+
+
+def _init_worker(mongo_url: str, db_name: str):
+    global _db
+    _db = MongoClient(mongo_url, w=1)[db_name]
+
+
+def _load_chunk(task) -> int:
+    kind, start, count, seed, product_count, user_count, password_hash, batch_size = task
+    if kind == "products":
+        docs = (make_product(seed, n) for n in range(start, start + count))
+    elif kind == "users":
+        docs = (make_user(seed, n, password_hash) for n in range(start, start + count))
+    else:
+        docs = (make_order(seed, n, product_count, user_count) for n in range(start, start + count))
+
+    collection = _db[kind]
+    batch = []
+    for doc in docs:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            _insert(collection, batch)
+            batch = []
+    if batch:
+        _insert(collection, batch)
+    return count
+
+
+def _insert(collection, batch):
+    try:
+        collection.insert_many(batch, ordered=False)
+    except BulkWriteError as e:
+        # Re-runs without --drop regenerate the same ids; keep the existing documents
+        if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+            raise
+
+
+def load(pool, kind, total, chunk_size, common):
+    if total <= 0:
+        return
+    tasks = [
+        (kind, start, min(chunk_size, total - start), *common)
+        for start in range(0, total, chunk_size)
+    ]
+    done = 0
+    start = time.perf_counter()
+    for count in pool.imap_unordered(_load_chunk, tasks):
+        done += count
+        elapsed = time.perf_counter() - start
+        print(f"\r{kind}: {done}/{total} ({done / elapsed:.0f} docs/s)", end="", flush=True)
+    elapsed = time.perf_counter() - start
+    print(f"\r{kind}: {total} in {elapsed:.1f}s ({total / elapsed:.0f} docs/s)")
+
+
+async def finalize(mongo_url, db_name):
+    """Indexes, facet counts and a catalog version bump, as the importer does"""
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    from catalog_cache import CatalogCache
+    from facets import rebuild_facets
+    from indexes import ensure_indexes
+
+    client = AsyncIOMotorClient(mongo_url)
+    db = client[db_name]
+    start = time.perf_counter()
+    await ensure_indexes(db)
+    print(f"indexes built in {time.perf_counter() - start:.1f}s")
+    start = time.perf_counter()
+    await rebuild_facets(db.products, db.product_facets)
+    await CatalogCache(db.meta).bump_version()
+    print(f"facets rebuilt in {time.perf_counter() - start:.1f}s")
+    client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--chunk-size", type=int, default=20_000, help="Documents per worker task")
+    parser.add_argument("--batch-size", type=int, default=1_000, help="Documents per insert_many")
+    parser.add_argument("--drop", action="store_true", help="Empty the collections before loading")
+    parser.add_argument("--mongo-url", default=os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default=os.environ.get("DB_NAME", "flipkart_scale"))
+    args = parser.parse_args()
+    if args.orders and (args.products <= 0 or args.users <= 0):
+        parser.error("orders need at least one product and one user")
+
+    db = MongoClient(args.mongo_url)[args.db]
+    if args.drop:
+        for name in ("products", "users", "orders", "product_facets"):
+            db.drop_collection(name)
+    for category in categories_data:
+        db.categories.update_one({"id": category["id"]}, {"$setOnInsert": dict(category)}, upsert=True)
+    db.client.close()
+
+    # One bcrypt hash shared by every user; hashing a million passwords would dominate the run
+    from auth import hash_password
+    password_hash = hash_password(PASSWORD)
+
+    common = (args.seed, args.products, args.users, password_hash, args.batch_size)
+    start = time.perf_counter()
+    with Pool(args.workers, initializer=_init_worker, initargs=(args.mongo_url, args.db)) as pool:
+        load(pool, "products", args.products, args.chunk_size, common)
+        load(pool, "users", args.users, args.chunk_size, common)
+        load(pool, "orders", args.orders, args.chunk_size, common)
+    print(f"loaded in {time.perf_counter() - start:.1f}s with {args.workers} workers")
+
+    asyncio.run(finalize(args.mongo_url, args.db))
+
+
+if __name__ == "__main__":
+    main()
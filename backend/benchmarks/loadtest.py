@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Load test: mixed browse/search/login/checkout traffic against the API
+
+Boots the FastAPI app in-process through httpx's ASGI transport against a
+local mongod scratch database (no network server involved), seeds it via
+the normal startup hooks, then runs `--concurrency` virtual users for
+`--duration` seconds. Each virtual user repeatedly picks a scenario by
+weight. Latency is recorded per route template; p50/p95/p99 and req/s are
+printed and written to a JSON file that a later run can be compared with.
+
+Usage:
+    cd backend && python benchmarks/loadtest.py --concurrency 50 --duration 30 --out results.json
+    cd backend && python benchmarks/loadtest.py --compare results.json --out after.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx
+from motor.motor_asyncio import AsyncIOMotorClient
+
+# Scenario weights; login and checkout hash passwords and write, so they are rarer
+SCENARIOS = {"browse": 60, "search": 25, "login": 10, "checkout": 5}
+
+PASSWORD = "loadtest-password"
+
+SHIPPING_ADDRESS = {
+    "fullName": "Load Test",
+    "phone": "9999999999",
+    "address": "1 Benchmark Road",
+    "city": "Bengaluru",
+    "state": "Karnataka",
+    "pincode": "560001",
+}
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.recording = False
+
+    async def call(self, client, label, method, url, **kwargs):
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        elapsed = time.perf_counter() - start
+        if self.recording:
+            self.latencies[label].append(elapsed)
+            if response.status_code >= 400:
+                self.errors[label] += 1
+        return response
+
+    def summary(self, elapsed):
+        routes = {}
+        for label, values in sorted(self.latencies.items()):
+            values.sort()
+            routes[label] = {
+                "count": len(values),
+                "errors": self.errors[label],
+                "rps": len(values) / elapsed,
+                "p50_ms": percentile(values, 0.50) * 1000,
+                "p95_ms": percentile(values, 0.95) * 1000,
+                "p99_ms": percentile(values, 0.99) * 1000,
+            }
+        return routes
+
+
+class Catalog:
+    """IDs and search terms discovered from the seeded catalog"""
+
+    def __init__(self, categories, products):
+        self.category_ids = [category["id"] for category in categories]
+        self.products = products
+        words = {product["name"].split()[0] for product in products if product.get("name")}
+        self.search_terms = sorted(words) or ["phone"]
+
+
+async def browse(client, recorder, catalog, rng, user):
+    await recorder.call(client, "GET /api/categories", "GET", "/api/categories")
+    category = rng.choice(catalog.category_ids)
+    await recorder.call(
+        client, "GET /api/products?category", "GET", "/api/products", params={"category": category, "limit": 20}
+    )
+    product = rng.choice(catalog.products)
+    await recorder.call(client, "GET /api/products/{product_id}", "GET", f"/api/products/{product['id']}")
+
+
+async def search(client, recorder, catalog, rng, user):
+    term = rng.choice(catalog.search_terms)
+    # Type-ahead: a prefix, then the full word
+    for query in (term[: max(2, len(term) // 2)], term):
+        await recorder.call(client, "GET /api/products/search", "GET", "/api/products/search", params={"q": query})
+
+
+async def login(client, recorder, catalog, rng, user):
+    response = await recorder.call(
+        client, "POST /api/auth/login", "POST", "/api/auth/login",
+        json={"email": user["email"], "password": PASSWORD}
+    )
+    if response.status_code == 200:
+        user["token"] = response.json()["access_token"]
+
+
+async def checkout(client, recorder, catalog, rng, user):
+    if "token" not in user:
+        await login(client, recorder, catalog, rng, user)
+        if "token" not in user:
+            return
+    headers = {"Authorization": f"Bearer {user['token']}"}
+    product = rng.choice(catalog.products)
+    quantity = rng.randint(1, 3)
+
+    await recorder.call(
+        client, "POST /api/cart", "POST", "/api/cart",
+        json={"productId": product["id"], "quantity": quantity}, headers=headers
+    )
+    await recorder.call(client, "GET /api/cart", "GET", "/api/cart", headers=headers)
+    response = await recorder.call(
+        client, "POST /api/checkout/reserve", "POST", "/api/checkout/reserve",
+        json={"items": [{"productId": product["id"], "quantity": quantity}]}, headers=headers
+    )
+    if response.status_code != 200:
+        return
+    await recorder.call(
+        client, "POST /api/orders", "POST", "/api/orders",
+        json={
+            "items": [{"productId": product["id"], "quantity": quantity}],
+            "shippingAddress": SHIPPING_ADDRESS,
+            "paymentMethod": "cod",
+            "reservationId": response.json()["reservationId"],
+        },
+        headers=headers,
+    )
+    await recorder.call(client, "DELETE /api/cart/{product_id}", "DELETE", f"/api/cart/{product['id']}", headers=headers)
+    await recorder.call(client, "GET /api/orders", "GET", "/api/orders", headers=headers)
+
+
+SCENARIO_FUNCTIONS = {"browse": browse, "search": search, "login": login, "checkout": checkout}
+
+
+async def virtual_user(client, recorder, catalog, user, seed, deadline):
+    rng = random.Random(seed)
+    names = list(SCENARIOS)
+    weights = [SCENARIOS[name] for name in names]
+    while time.perf_counter() < deadline:
+        scenario = rng.choices(names, weights)[0]
+        await SCENARIO_FUNCTIONS[scenario](client, recorder, catalog, rng, user)
+
+
+async def create_users(client, count):
+    users = []
+    for i in range(count):
+        user = {"email": f"loadtest-{i}@example.com"}
+        await client.post("/api/auth/signup", json={
+            "name": f"Load Test {i}", "email": user["email"], "phone": "9999999999", "password": PASSWORD
+        })
+        users.append(user)
+    return users
+
+
+def print_summary(routes, baseline=None, threshold=0.10):
+    header = f"{'route':<36}{'count':>8}{'err':>6}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+    print(header)
+    regressions = []
+    for label, stats in routes.items():
+        line = (
+            f"{label:<36}{stats['count']:>8}{stats['errors']:>6}{stats['rps']:>9.1f}"
+            f"{stats['p50_ms']:>9.2f}{stats['p95_ms']:>9.2f}{stats['p99_ms']:>9.2f}"
+        )
+        before = (baseline or {}).get(label)
+        if before and before["p95_ms"] > 0:
+            change = stats["p95_ms"] / before["p95_ms"] - 1
+            line += f"  p95 {change:+.0%}"
+            if change > threshold:
+                regressions.append(label)
+                line += "  REGRESSION"
+        print(line)
+    return regressions
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--warmup", type=float, default=5.0)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default="loadtest_results.json")
+    parser.add_argument("--compare", help="Earlier results file to diff p95 latency against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="p95 increase flagged as a regression")
+    parser.add_argument("--mongo-url", default=os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default="bench_loadtest")
+    args = parser.parse_args()
+
+    # server reads its configuration at import time
+    os.environ["MONGO_URL"] = args.mongo_url
+    os.environ["DB_NAME"] = args.db
+    os.environ.setdefault("JWT_SECRET", "loadtest-secret")
+    import server
+
+    await server.client.drop_database(args.db)
+    # ASGITransport does not send lifespan events, so run the hooks directly
+    await server.app.router.startup()
+    recorder = Recorder()
+    transport = httpx.ASGITransport(app=server.app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+            categories = (await client.get("/api/categories")).json()
+            products = (await client.get("/api/products", params={"limit": 500})).json()
+            catalog = Catalog(categories, products)
+            users = await create_users(client, args.users)
+            print(f"{len(catalog.products)} products, {len(catalog.category_ids)} categories, {len(users)} users")
+
+            async def run_phase(seconds, seed_offset):
+                deadline = time.perf_counter() + seconds
+                await asyncio.gather(*(
+                    virtual_user(client, recorder, catalog, users[i % len(users)], args.seed + seed_offset + i, deadline)
+                    for i in range(args.concurrency)
+                ))
+
+            await run_phase(args.warmup, 0)
+            recorder.recording = True
+            start = time.perf_counter()
+            await run_phase(args.duration, args.concurrency)
+            elapsed = time.perf_counter() - start
+    finally:
+        await server.app.router.shutdown()
+
+    routes = recorder.summary(elapsed)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["routes"]
+    regressions = print_summary(routes, baseline, args.threshold)
+    total = sum(stats["count"] for stats in routes.values())
+    print(f"\n{total} requests in {elapsed:.1f}s ({total / elapsed:.0f} req/s)")
+
+    results = {
+        "config": {
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "users": args.users,
+            "seed": args.seed,
+            "scenarios": SCENARIOS,
+        },
+        "elapsed": elapsed,
+        "total_rps": total / elapsed,
+        "routes": routes,
+    }
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.out}")
+
+    # Drop the scratch database with a fresh client; the app's one is closed
+    cleanup = AsyncIOMotorClient(args.mongo_url)
+    await cleanup.drop_database(args.db)
+    cleanup.close()
+    raise SystemExit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for per-request Python costs, tracked per commit
+
+Covers list serialization (the legacy convert_objectid_to_str walk and the
+products_out + orjson path that replaced it), Pydantic construction and
+dumping of Product/Order lists, JWT create/decode, and hash_password at
+several bcrypt cost factors.
+
+Each benchmark is calibrated to run for roughly --min-time per repeat; the
+median of --repeat runs is reported per call. Results are stored in a JSON
+history keyed by git commit, and compared against the previous commit in
+the history (or --against SHA) recorded on the same machine and Python
+version. A median slower by more than --threshold is reported as a
+regression and makes the script exit non-zero. The default history file
+is git-ignored; it is local to the machine that produced it.
+
+Usage:
+    cd backend && python benchmarks/microbench.py
+    cd backend && python benchmarks/microbench.py --filter auth --against 1a2b3c4
+    cd backend && python benchmarks/microbench.py --no-save
+"""
+
+import argparse
+import copy
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from passlib.context import CryptContext
+from pydantic import TypeAdapter
+
+import auth
+from bench_serialization import legacy_convert, make_orders, make_products
+from models import Order, Product
+from serialization import dumps, products_out
+
+DEFAULT_HISTORY = Path(__file__).resolve().parent / "microbench_history.json"
+
+BCRYPT_COSTS = (4, 8, 10, 12)
+
+BENCHMARKS: Dict[str, Callable[[], Callable[[], object]]] = {}
+
+
+def benchmark(name: str):
+    """Register a factory that does its setup and returns the timed callable"""
+    def register(factory):
+        BENCHMARKS[name] = factory
+        return factory
+    return register
+
+
+# Serialization of a 100-product page. Both paths start from a deep copy,
+# standing in for fresh documents from Mongo; serialize.copy is that cost alone.
+PAGE_SIZE = 100
+
+
+@benchmark("serialize.copy")
+def _copy():
+    docs = make_products(PAGE_SIZE)
+    return lambda: copy.deepcopy(docs)
+
+
+@benchmark("serialize.legacy_convert")
+def _legacy_convert():
+    docs = make_products(PAGE_SIZE)
+    return lambda: legacy_convert(copy.deepcopy(docs))
+
+
+@benchmark("serialize.products_out_dumps")
+def _products_out_dumps():
+    docs = make_products(PAGE_SIZE)
+    return lambda: dumps(products_out(copy.deepcopy(docs)))
+
+
+@benchmark("pydantic.product_list_validate")
+def _product_validate():
+    docs = products_out(make_products(PAGE_SIZE))
+    adapter = TypeAdapter(List[Product])
+    return lambda: adapter.validate_python(docs)
+
+
+@benchmark("pydantic.product_list_dump")
+def _product_dump():
+    adapter = TypeAdapter(List[Product])
+    models = adapter.validate_python(products_out(make_products(PAGE_SIZE)))
+    return lambda: adapter.dump_json(models)
+
+
+@benchmark("pydantic.order_list_validate")
+def _order_validate():
+    docs = make_orders(PAGE_SIZE)
+    adapter = TypeAdapter(List[Order])
+    return lambda: adapter.validate_python(docs)
+
+
+@benchmark("pydantic.order_list_dump")
+def _order_dump():
+    adapter = TypeAdapter(List[Order])
+    models = adapter.validate_python(make_orders(PAGE_SIZE))
+    return lambda: adapter.dump_json(models)
+
+
+@benchmark("auth.create_access_token")
+def _create_token():
+    return lambda: auth.create_access_token({"sub": "bench-user"})
+
+
+@benchmark("auth.decode_access_token_cached")
+def _decode_cached():
+    token = auth.create_access_token({"sub": "bench-user"})
+    auth.decode_access_token(token)
+    return lambda: auth.decode_access_token(token)
+
+
+@benchmark("auth.decode_access_token_uncached")
+def _decode_uncached():
+    token = auth.create_access_token({"sub": "bench-user"})
+    uncached = auth.TokenCache(0)
+
+    def run():
+        cache, auth.token_cache = auth.token_cache, uncached
+        try:
+            return auth.decode_access_token(token)
+        finally:
+            auth.token_cache = cache
+    return run
+
+
+def _hash_benchmark(rounds: int):
+    def factory():
+        context = CryptContext(schemes=["bcrypt"], bcrypt__default_rounds=rounds)
+
+        def run():
+            default, auth.pwd_context = auth.pwd_context, context
+            try:
+                return auth.hash_password("bench-password")
+            finally:
+                auth.pwd_context = default
+        return run
+    return factory
+
+
+for _rounds in BCRYPT_COSTS:
+    benchmark(f"auth.hash_password_cost{_rounds:02d}")(_hash_benchmark(_rounds))
+
+
+def measure(fn: Callable[[], object], repeat: int, min_time: float) -> dict:
+    """Median and spread of per-call time, in microseconds"""
+    fn()
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or loops >= 1 << 20:
+            break
+        loops *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        samples.append((time.perf_counter() - start) / loops * 1e6)
+    return {
+        "median_us": statistics.median(samples),
+        "stdev_us": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "loops": loops,
+    }
+
+
+def git(*args) -> str:
+    try:
+        return subprocess.run(["git", *args], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def load_history(path: Path) -> dict:
+    if path.exists():
+        with open(path) as f:
+            return json.load(f)
+    return {"runs": []}
+
+
+def find_baseline(history: dict, sha: str, against: str):
+    # Timings are only comparable on the same machine and interpreter
+    runs = [
+        run for run in history["runs"]
+        if run["machine"] == platform.node() and run["python"] == platform.python_version()
+    ]
+    if against:
+        matches = [run for run in runs if run["commit"].startswith(against)]
+        return matches[-1] if matches else None
+    earlier = [run for run in runs if run["commit"] != sha]
+    return earlier[-1] if earlier else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filter", default="", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds per repeat")
+    parser.add_argument("--history", type=Path, default=DEFAULT_HISTORY)
+    parser.add_argument("--against", help="Compare with this commit instead of the previous one")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Slowdown reported as a regression")
+    parser.add_argument("--no-save", action="store_true", help="Do not record this run in the history")
+    args = parser.parse_args()
+
+    sha = git("rev-parse", "HEAD") or "unknown"
+    dirty = bool(git("status", "--porcelain", "--untracked-files=no"))
+    history = load_history(args.history)
+    baseline = find_baseline(history, sha, args.against)
+    previous = baseline["results"] if baseline else {}
+    if baseline:
+        print(f"comparing with {baseline['commit'][:10]} ({baseline['timestamp']})")
+
+    print(f"{'benchmark':<38}{'median us':>12}{'stdev':>10}{'change':>9}")
+    results = {}
+    regressions = []
+    for name, factory in BENCHMARKS.items():
+        if args.filter not in name:
+            continue
+        result = measure(factory(), args.repeat, args.min_time)
+        results[name] = result
+        line = f"{name:<38}{result['median_us']:>12.2f}{result['stdev_us']:>10.2f}"
+        before = previous.get(name)
+        if before:
+            change = result["median_us"] / before["median_us"] - 1
+            line += f"{change:>+9.1%}"
+            if change > args.threshold:
+                regressions.append(name)
+                line += "  REGRESSION"
+        print(line)
+
+    if not args.no_save:
+        # Re-running on the same commit replaces its entry
+        history["runs"] = [run for run in history["runs"] if not (run["commit"] == sha and run["dirty"] == dirty)]
+        history["runs"].append({
+            "commit": sha,
+            "dirty": dirty,
+            "subject": git("log", "-1", "--format=%s"),
+            "timestamp": datetime.utcnow().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.node(),
+            "results": results,
+        })
+        with open(args.history, "w") as f:
+            json.dump(history, f, indent=2)
+        print(f"recorded {sha[:10]}{' (dirty)' if dirty else ''} in {args.history}")
+
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+    raise SystemExit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Local Razorpay stub for offline payment load tests
+
+Serves the subset of the Razorpay REST API the backend uses, with
+configurable latency and failure rate. By default it also drives the
+RazorpayGateway adapter against itself and reports throughput; with
+--serve-only it just runs, so the backend can be pointed at it:
+
+    RAZORPAY_KEY_ID=rzp_test RAZORPAY_KEY_SECRET=secret \\
+    RAZORPAY_BASE_URL=http://127.0.0.1:9100/v1 uvicorn server:app
+
+Usage:
+    cd backend && python benchmarks/razorpay_stub.py --requests 2000 --concurrency 100
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from payments import RazorpayGateway, PaymentGatewayError
+
+
+def make_stub(latency_ms: float, failure_rate: float) -> FastAPI:
+    stub = FastAPI(title="Razorpay stub")
+
+    @stub.post("/v1/orders")
+    async def create_order(request: Request):
+        body = await request.json()
+        await asyncio.sleep(latency_ms / 1000)
+        if random.random() < failure_rate:
+            return JSONResponse({"error": {"code": "SERVER_ERROR"}}, status_code=503)
+        return {
+            "id": f"order_{uuid.uuid4().hex[:14]}",
+            "entity": "order",
+            "amount": body["amount"],
+            "currency": body.get("currency", "INR"),
+            "receipt": body.get("receipt"),
+            "status": "created",
+        }
+
+    return stub
+
+
+async def drive(base_url: str, total: int, concurrency: int):
+    gateway = RazorpayGateway("rzp_test_stub", "stub_secret", base_url=base_url, max_connections=concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    failures = 0
+
+    async def one():
+        nonlocal failures
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await gateway.create_order(49900)
+                latencies.append((time.perf_counter() - start) * 1000)
+            except PaymentGatewayError:
+                failures += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - start
+    await gateway.aclose()
+
+    latencies.sort()
+    print(f"requests: {total}  concurrency: {concurrency}  failures: {failures}")
+    print(f"throughput: {total / elapsed:.0f} req/s")
+    if latencies:
+        print(f"p50: {statistics.median(latencies):.1f} ms  "
+              f"p99: {latencies[int(len(latencies) * 0.99) - 1]:.1f} ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--serve-only", action="store_true")
+    args = parser.parse_args()
+
+    config = uvicorn.Config(
+        make_stub(args.latency_ms, args.failure_rate),
+        host=args.host, port=args.port, log_level="warning",
+    )
+    server = uvicorn.Server(config)
+    if args.serve_only:
+        await server.serve()
+        return
+
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    try:
+        await drive(f"http://{args.host}:{args.port}/v1", args.requests, args.concurrency)
+    finally:
+        server.should_exit = True
+        await serving
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,54 @@
+# Write operations for the server-side cart (one document per user)
+from datetime import datetime
+from typing import Dict, List
+
+from pymongo import UpdateOne
+
+# Projection used whenever a cart is returned to the client
+CART_PROJECTION = {"_id": 0, "items": 1}
+
+
+def ensure_cart_op(user_id: str, now: datetime) -> UpdateOne:
+    """Create the user's cart document if it does not exist yet"""
+    return UpdateOne(
+        {"userId": user_id},
+        {"$setOnInsert": {"userId": user_id, "items": []}, "$set": {"updatedAt": now}},
+        upsert=True,
+    )
+
+
+def ensure_item_op(user_id: str, product_id: str, now: datetime) -> UpdateOne:
+    """Add a zero-quantity line for product_id unless one is already there.
+
+    The `$ne` guard is evaluated atomically with the push, so concurrent
+    adds of the same product never create duplicate lines.
+    """
+    return UpdateOne(
+        {"userId": user_id, "items.productId": {"$ne": product_id}},
+        {"$push": {"items": {"productId": product_id, "quantity": 0, "addedAt": now}}},
+    )
+
+
+def increment_filter(user_id: str, product_id: str) -> dict:
+    return {"userId": user_id, "items.productId": product_id}
+
+
+def increment_update(quantity: int) -> dict:
+    """Positional `$inc` on an existing line; no read-modify-write"""
+    return {"$inc": {"items.$.quantity": quantity}}
+
+
+def merge_ops(user_id: str, quantities: Dict[str, int], now: datetime) -> List[UpdateOne]:
+    """Operations that add every (productId, quantity) to the cart in one ordered bulk write"""
+    ops = [ensure_cart_op(user_id, now)]
+    for product_id, quantity in quantities.items():
+        ops.append(ensure_item_op(user_id, product_id, now))
+        ops.append(UpdateOne(increment_filter(user_id, product_id), increment_update(quantity)))
+    return ops
+
+
+def visible_items(cart: dict) -> List[dict]:
+    """Cart lines worth showing; lines left at zero by a racing delete are hidden"""
+    if not cart:
+        return []
+    return [item for item in cart.get("items", []) if item.get("quantity", 0) > 0]
@@ -0,0 +1,158 @@
+# Read-through cache for catalog responses with versioned invalidation
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from pymongo import ReturnDocument
+from starlette.responses import Response
+
+from compression import COMPRESSION_MIN_SIZE, CACHED_LEVELS, choose_encoding, compress
+from serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+CATALOG_VERSION_ID = "catalog_version"
+
+
+def compute_etag(body: bytes) -> str:
+    """Strong validator for a rendered body"""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    """If-None-Match uses weak comparison, so W/ prefixes are ignored"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+class CachedResponse:
+    """A rendered catalog payload tagged with the catalog version it came from.
+
+    The ETag is computed once when the entry is populated, so conditional
+    requests are answered without hashing or touching Mongo. Compressed
+    variants are made on first request for each encoding and kept with the
+    entry, so a payload is compressed at most once per catalog version.
+    """
+
+    __slots__ = ("body", "etag", "version", "expires_at", "variants")
+
+    def __init__(self, body: bytes, version: int, expires_at: float):
+        self.body = body
+        self.etag = compute_etag(body)
+        self.version = version
+        self.expires_at = expires_at
+        self.variants: Dict[str, bytes] = {}
+
+    def encoded(self, encoding: str) -> bytes:
+        variant = self.variants.get(encoding)
+        if variant is None:
+            variant = self.variants[encoding] = compress(self.body, encoding, CACHED_LEVELS)
+        return variant
+
+    def to_response(self, if_none_match: Optional[str] = None, accept_encoding: Optional[str] = None) -> Response:
+        encoding = choose_encoding(accept_encoding) if len(self.body) >= COMPRESSION_MIN_SIZE else None
+        # Each encoding is a distinct representation, so it gets its own ETag
+        etag = self.etag if encoding is None else f'{self.etag[:-1]}-{encoding}"'
+        headers = {"ETag": etag, "Vary": "Accept-Encoding"}
+        if etag_matches(etag, if_none_match):
+            return Response(status_code=304, headers=headers)
+        if encoding is None:
+            return Response(content=self.body, media_type="application/json", headers=headers)
+        headers["Content-Encoding"] = encoding
+        return Response(content=self.encoded(encoding), media_type="application/json", headers=headers)
+
+
+class CatalogCache:
+    """In-process LRU of rendered catalog responses.
+
+    Every entry is tagged with the catalog version counter stored in the
+    ``meta`` collection. Each worker re-reads that counter at most once per
+    ``version_check_interval`` seconds, so a product write made by any
+    worker is visible everywhere within that window. Entries also expire
+    after ``ttl`` seconds as a backstop.
+    """
+
+    def __init__(self, meta_collection, ttl: float = 300.0, max_entries: int = 1024,
+                 version_check_interval: float = 1.0):
+        self.meta = meta_collection
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.version_check_interval = version_check_interval
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._version: Optional[int] = None
+        self._version_checked_at = 0.0
+        self._version_listeners: List[Callable[[int], None]] = []
+        self.hits = 0
+        self.misses = 0
+
+    def on_version_change(self, listener: Callable[[int], None]):
+        """Register a callback fired when another worker bumps the version"""
+        self._version_listeners.append(listener)
+
+    def _set_version(self, version: int, notify: bool):
+        changed = self._version is not None and version != self._version
+        self._version = version
+        self._version_checked_at = time.monotonic()
+        if changed:
+            self._entries.clear()
+            if notify:
+                for listener in self._version_listeners:
+                    listener(version)
+
+    async def current_version(self) -> int:
+        if self._version is None or time.monotonic() - self._version_checked_at >= self.version_check_interval:
+            doc = await self.meta.find_one({"_id": CATALOG_VERSION_ID})
+            self._set_version(doc["version"] if doc else 0, notify=True)
+        return self._version
+
+    async def bump_version(self) -> int:
+        """Record a catalog write; call after any product or category change"""
+        doc = await self.meta.find_one_and_update(
+            {"_id": CATALOG_VERSION_ID},
+            {"$inc": {"version": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        # This worker already knows about its own write
+        self._set_version(doc["version"], notify=False)
+        self._entries.clear()
+        return doc["version"]
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable]) -> CachedResponse:
+        """Return the cached payload for key, rendering it via loader on a miss"""
+        version = await self.current_version()
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and entry.version == version and entry.expires_at > now:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        content = await loader()
+        entry = CachedResponse(dumps(content), version, now + self.ttl)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def stats(self) -> dict:
+        return {
+            "version": self._version,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
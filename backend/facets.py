@@ -0,0 +1,184 @@
+# Product filters and precomputed facet rollups
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pymongo import ReplaceOne, UpdateOne
+
+# Disjoint buckets as (label, lower bound inclusive, upper bound exclusive)
+PRICE_BUCKETS: List[Tuple[str, float, Optional[float]]] = [
+    ("0-500", 0, 500),
+    ("500-1000", 500, 1000),
+    ("1000-5000", 1000, 5000),
+    ("5000-20000", 5000, 20000),
+    ("20000-50000", 20000, 50000),
+    ("50000+", 50000, None),
+]
+RATING_BUCKETS: List[Tuple[str, float, Optional[float]]] = [
+    ("0-2", 0, 2),
+    ("2-3", 2, 3),
+    ("3-4", 3, 4),
+    ("4-4.5", 4, 4.5),
+    ("4.5+", 4.5, None),
+]
+DISCOUNT_BUCKETS: List[Tuple[str, float, Optional[float]]] = [
+    ("0-10", 0, 10),
+    ("10-25", 10, 25),
+    ("25-50", 25, 50),
+    ("50+", 50, None),
+]
+RANGE_FACETS = {
+    "price": PRICE_BUCKETS,
+    "rating": RATING_BUCKETS,
+    "discount": DISCOUNT_BUCKETS,
+}
+FLAG_FACETS = ("fastDelivery", "inStock")
+
+# Fields a product needs for its facet contribution
+FACET_PROJECTION = {"categoryId": 1, "price": 1, "rating": 1, "discount": 1, "fastDelivery": 1, "inStock": 1}
+
+ALL_SCOPE = "all"
+
+
+def category_scope(category_id) -> str:
+    return f"category:{category_id}"
+
+
+def facet_key(label: str) -> str:
+    """Field name a bucket label is stored under; Mongo paths cannot contain dots"""
+    return label.replace(".", "_")
+
+
+def bucket_label(buckets, value) -> Optional[str]:
+    if value is None:
+        return None
+    for label, low, high in buckets:
+        if value >= low and (high is None or value < high):
+            return label
+    return None
+
+
+def facet_increments(product: dict) -> Dict[str, int]:
+    """The counts a product adds to a rollup"""
+    increments = {"total": 1}
+    for field, buckets in RANGE_FACETS.items():
+        label = bucket_label(buckets, product.get(field))
+        if label is not None:
+            increments[f"{field}.{facet_key(label)}"] = 1
+    for field in FLAG_FACETS:
+        # Products default to in stock, matching the Product model
+        default = field == "inStock"
+        increments[f"{field}.{str(bool(product.get(field, default))).lower()}"] = 1
+    return increments
+
+
+def facet_changes(changes: Iterable[Tuple[Optional[dict], Optional[dict]]]) -> Dict[str, Dict[str, int]]:
+    """Net rollup increments per scope for products going from before to after.
+
+    Either side of a pair may be None for a product that did not exist
+    (or no longer does). Counts that cancel out are dropped, so rewriting a
+    product without touching its facet fields produces no change.
+    """
+    totals: Dict[str, Dict[str, int]] = {}
+    for before, after in changes:
+        for product, sign in ((before, -1), (after, 1)):
+            if product is None:
+                continue
+            increments = facet_increments(product)
+            for scope in (ALL_SCOPE, category_scope(product.get("categoryId"))):
+                rollup = totals.setdefault(scope, {})
+                for path, delta in increments.items():
+                    rollup[path] = rollup.get(path, 0) + sign * delta
+    return {
+        scope: {path: delta for path, delta in rollup.items() if delta}
+        for scope, rollup in totals.items()
+        if any(rollup.values())
+    }
+
+
+async def apply_facet_changes(facets_collection, changes: Dict[str, Dict[str, int]]):
+    """$inc each scope's rollup by the output of facet_changes"""
+    ops = [UpdateOne({"_id": scope}, {"$inc": increments}, upsert=True) for scope, increments in changes.items()]
+    if ops:
+        await facets_collection.bulk_write(ops, ordered=False)
+
+
+async def rebuild_facets(products_collection, facets_collection, batch_size: int = 1000) -> int:
+    """Recompute every rollup from scratch with one pass over the products.
+
+    Used for seeding and bulk loads; imports keep the rollups current with
+    apply_facet_changes instead of rescanning the catalog.
+
+    Each scope document is replaced in place and stale scopes are deleted
+    afterwards, so readers never see an empty or half-written collection and
+    concurrent rebuilds (e.g. several workers at startup) do not collide.
+    """
+    rollups: Dict[str, Dict[str, int]] = {}
+    count = 0
+    cursor = products_collection.find({}, FACET_PROJECTION).batch_size(batch_size)
+    async for product in cursor:
+        increments = facet_increments(product)
+        for scope in (ALL_SCOPE, category_scope(product.get("categoryId"))):
+            rollup = rollups.setdefault(scope, {})
+            for path, delta in increments.items():
+                rollup[path] = rollup.get(path, 0) + delta
+        count += 1
+
+    ops = []
+    for scope, rollup in rollups.items():
+        doc = {"_id": scope}
+        for path, value in rollup.items():
+            if "." in path:
+                field, label = path.split(".", 1)
+                doc.setdefault(field, {})[label] = value
+            else:
+                doc[path] = value
+        ops.append(ReplaceOne({"_id": scope}, doc, upsert=True))
+    if ops:
+        await facets_collection.bulk_write(ops, ordered=False)
+    await facets_collection.delete_many({"_id": {"$nin": list(rollups)}})
+    return count
+
+
+async def get_facets(facets_collection, category: Optional[int]) -> dict:
+    """Precomputed counts for a category (or the whole catalog), zero-filled"""
+    scope = category_scope(category) if category else ALL_SCOPE
+    doc = await facets_collection.find_one({"_id": scope}) or {}
+    facets = {"total": doc.get("total", 0)}
+    for field, buckets in RANGE_FACETS.items():
+        counts = doc.get(field, {})
+        facets[field] = {label: counts.get(facet_key(label), 0) for label, _, _ in buckets}
+    for field in FLAG_FACETS:
+        counts = doc.get(field, {})
+        facets[field] = {"true": counts.get("true", 0), "false": counts.get("false", 0)}
+    return facets
+
+
+def build_product_filter(
+    category: Optional[int] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    min_rating: Optional[float] = None,
+    min_discount: Optional[int] = None,
+    fast_delivery: Optional[bool] = None,
+    in_stock: Optional[bool] = None,
+) -> dict:
+    """Mongo filter for the product listing's query parameters"""
+    query = {}
+    if category:
+        query["categoryId"] = category
+    if fast_delivery is not None:
+        query["fastDelivery"] = fast_delivery
+    if in_stock is not None:
+        # Products without the flag count as in stock
+        query["inStock"] = {"$ne": False} if in_stock else False
+    price = {}
+    if min_price is not None:
+        price["$gte"] = min_price
+    if max_price is not None:
+        price["$lte"] = max_price
+    if price:
+        query["price"] = price
+    if min_rating is not None:
+        query["rating"] = {"$gte": min_rating}
+    if min_discount is not None:
+        query["discount"] = {"$gte": min_discount}
+    return query
@@ -0,0 +1,289 @@
+# Bulk product import from NDJSON or CSV
+import asyncio
+import csv
+import json
+import logging
+import uuid
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from facets import FACET_PROJECTION, apply_facet_changes, facet_changes
+from models import ProductCreate
+
+logger = logging.getLogger(__name__)
+
+# Namespace for ids derived from (categoryId, name) when a row has no id
+PRODUCT_ID_NAMESPACE = uuid.UUID("0f6b8d3e-5c1a-4b7e-9a52-3d0c6f1e2a47")
+
+# Row errors kept in the report; the count covers all of them
+MAX_REPORTED_ERRORS = 1000
+
+# Line number and parsed row; the row is None when the line failed to parse
+Row = Tuple[int, Optional[dict]]
+
+
+def stable_product_id(row: dict) -> str:
+    """The row's own id, or one derived from the exact (categoryId, name) it is matched on"""
+    if row.get("id"):
+        return str(row["id"])
+    return str(uuid.uuid5(PRODUCT_ID_NAMESPACE, f"{row.get('categoryId')}:{row.get('name', '')}"))
+
+
+def iter_ndjson(lines: Iterable[str], errors: List[dict]) -> Iterator[Row]:
+    """Rows of an NDJSON file; lines that fail to parse are reported and yielded as None"""
+    for line_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            errors.append({"line": line_number, "error": f"Invalid JSON: {e}"})
+            row = None
+        if row is not None and not isinstance(row, dict):
+            errors.append({"line": line_number, "error": "Expected a JSON object"})
+            row = None
+        yield line_number, row
+
+
+def iter_csv(lines: Iterable[str], errors: List[dict]) -> Iterator[Row]:
+    """CSV rows; `images` is pipe-separated and `specifications` a JSON object"""
+    reader = csv.DictReader(lines)
+    for row in reader:
+        # Header is line 1
+        line_number = reader.line_num
+        row = {key: value for key, value in row.items() if key and value not in (None, "")}
+        try:
+            if "images" in row:
+                row["images"] = [url.strip() for url in row["images"].split("|") if url.strip()]
+            if "specifications" in row:
+                row["specifications"] = json.loads(row["specifications"])
+        except ValueError as e:
+            errors.append({"line": line_number, "error": f"Invalid specifications: {e}"})
+            row = None
+        yield line_number, row
+
+
+def validate_rows(rows: List[Row], errors: List[dict]) -> List[Row]:
+    """Validate against ProductCreate; bad rows are reported, not raised"""
+    docs = []
+    for line_number, row in rows:
+        if row is None:
+            # Already reported by the parser
+            continue
+        try:
+            product = ProductCreate.model_validate(row)
+        except ValidationError as e:
+            errors.append({"line": line_number, "error": e.errors(include_url=False, include_input=False)})
+            continue
+        doc = product.model_dump()
+        # Rows without an id are matched on (categoryId, name) when written
+        if row.get("id"):
+            doc["id"] = str(row["id"])
+        docs.append((line_number, doc))
+    return docs
+
+
+def _upsert_op(doc: dict, now: datetime) -> UpdateOne:
+    if "id" in doc:
+        return UpdateOne({"id": doc["id"]}, {"$set": doc, "$setOnInsert": {"createdAt": now}}, upsert=True)
+    # Seeded products have no stored id, so exports of them carry none;
+    # matching on (categoryId, name) updates them instead of duplicating them
+    return UpdateOne(
+        {"categoryId": doc["categoryId"], "name": doc["name"]},
+        {"$set": doc, "$setOnInsert": {"id": stable_product_id(doc), "createdAt": now}},
+        upsert=True,
+    )
+
+
+def _match_key(doc: dict) -> tuple:
+    """What _upsert_op matches an existing product on"""
+    if "id" in doc:
+        return ("id", doc["id"])
+    return ("name", doc["categoryId"], doc["name"])
+
+
+def dedupe_rows(rows: List[Row], errors: List[dict]) -> List[dict]:
+    """One doc per match key; earlier rows for a key are reported as superseded.
+
+    Unordered upserts of the same key in one chunk could race into two
+    inserts, so only the last row for each key is written.
+    """
+    last_lines = {}
+    by_key = {}
+    for line_number, doc in rows:
+        key = _match_key(doc)
+        if key in by_key:
+            errors.append({"line": last_lines[key], "error": f"Superseded by line {line_number} for the same product"})
+        last_lines[key] = line_number
+        by_key[key] = doc
+    return list(by_key.values())
+
+
+async def _stored_products(collection, docs: List[dict]) -> Dict[tuple, dict]:
+    """Facet fields of the products these docs will overwrite, in one query"""
+    clauses = [{"categoryId": doc["categoryId"], "name": doc["name"]} for doc in docs if "id" not in doc]
+    ids = [doc["id"] for doc in docs if "id" in doc]
+    if ids:
+        clauses.append({"id": {"$in": ids}})
+    stored = {}
+    async for product in collection.find({"$or": clauses}, dict(FACET_PROJECTION, id=1, name=1, _id=0)):
+        if product.get("id"):
+            stored[("id", product["id"])] = product
+        stored[("name", product.get("categoryId"), product.get("name"))] = product
+    return stored
+
+
+async def write_chunk(collection, docs: List[dict], facets_collection=None) -> Tuple[int, int, List[dict]]:
+    """Unordered upserts keyed on id, or on (categoryId, name) for rows without one.
+
+    ``docs`` must hold one doc per key (see dedupe_rows). With
+    ``facets_collection``, the rollups are moved by the difference
+    between each stored product and what replaced it. Concurrent writes to
+    the same product can skew them; rebuild_facets sets them straight.
+    Returns (upserted, modified, write errors).
+    """
+    if not docs:
+        return 0, 0, []
+    stored = await _stored_products(collection, docs) if facets_collection is not None else {}
+    now = datetime.utcnow()
+    ops = [_upsert_op(doc, now) for doc in docs]
+    try:
+        result = await collection.bulk_write(ops, ordered=False)
+        upserted, modified, failed = result.upserted_count, result.modified_count, []
+    except BulkWriteError as e:
+        details = e.details
+        upserted, modified = details.get("nUpserted", 0), details.get("nModified", 0)
+        failed = details.get("writeErrors", [])
+
+    if facets_collection is not None:
+        failed_indexes = {error["index"] for error in failed}
+        changes = facet_changes(
+            (stored.get(_match_key(doc)), {**stored.get(_match_key(doc), {}), **doc})
+            for index, doc in enumerate(docs)
+            if index not in failed_indexes
+        )
+        await apply_facet_changes(facets_collection, changes)
+
+    write_errors = [
+        {"id": stable_product_id(docs[error["index"]]), "error": error.get("errmsg")}
+        for error in failed
+    ]
+    return upserted, modified, write_errors
+
+
+async def import_products(collection, rows: Iterable[Row], errors: List[dict],
+                          chunk_size: int = 1000, max_in_flight: int = 4, facets_collection=None) -> dict:
+    """Validate and upsert rows in chunks, overlapping validation with writes.
+
+    Parsing and validation errors collected in ``errors`` and write errors
+    are reported per row; the import carries on past them. Facet rollups in
+    ``facets_collection``, if given, are updated chunk by chunk.
+    """
+    processed = upserted = modified = 0
+    pending = set()
+
+    async def drain(wait_for_all: bool):
+        nonlocal upserted, modified
+        while pending and (wait_for_all or len(pending) >= max_in_flight):
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                pending.discard(task)
+                chunk_upserted, chunk_modified, write_errors = task.result()
+                upserted += chunk_upserted
+                modified += chunk_modified
+                errors.extend(write_errors)
+
+    chunk: List[Row] = []
+
+    async def flush():
+        nonlocal processed
+        processed += len(chunk)
+        docs = dedupe_rows(validate_rows(chunk, errors), errors)
+        await drain(wait_for_all=False)
+        pending.add(asyncio.create_task(write_chunk(collection, docs, facets_collection)))
+        # Give the event loop (and other requests) a turn between chunks
+        await asyncio.sleep(0)
+
+    try:
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                await flush()
+                chunk = []
+        if chunk:
+            await flush()
+    finally:
+        # Never leave chunk writes running behind a failed parse
+        await drain(wait_for_all=True)
+
+    return {
+        "processed": processed,
+        "upserted": upserted,
+        "modified": modified,
+        "error_count": len(errors),
+        "errors": errors[:MAX_REPORTED_ERRORS],
+    }
+
+
+def detect_format(filename: str, declared: str = None) -> str:
+    fmt = (declared or filename.rsplit(".", 1)[-1]).lower()
+    if fmt in ("ndjson", "jsonl", "json"):
+        return "ndjson"
+    if fmt == "csv":
+        return "csv"
+    raise ValueError(f"Unsupported import format: {fmt}")
+
+
+def parse_rows(lines: Iterable[str], fmt: str, errors: List[dict]) -> Iterator[Row]:
+    return iter_csv(lines, errors) if fmt == "csv" else iter_ndjson(lines, errors)
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import time
+    from pathlib import Path
+
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    from catalog_cache import CatalogCache
+
+    load_dotenv(Path(__file__).parent / '.env')
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Bulk import products from NDJSON or CSV")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["ndjson", "csv"])
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    async def main():
+        client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+        db = client[os.environ['DB_NAME']]
+        fmt = detect_format(args.path, args.format)
+        errors: List[dict] = []
+        start = time.perf_counter()
+        with open(args.path, newline="", encoding="utf-8") as f:
+            report = await import_products(
+                db.products, parse_rows(f, fmt, errors), errors, args.chunk_size,
+                facets_collection=db.product_facets,
+            )
+        elapsed = time.perf_counter() - start
+
+        # Running servers pick the new catalog up within their staleness window
+        await CatalogCache(db.meta).bump_version()
+        client.close()
+
+        for error in report["errors"][:20]:
+            print(f"error: {error}")
+        print(f"processed {report['processed']} rows in {elapsed:.1f}s "
+              f"({report['processed'] / max(elapsed, 1e-9):.0f} rows/s): "
+              f"{report['upserted']} inserted, {report['modified']} updated, {report['error_count']} errors")
+
+    asyncio.run(main())
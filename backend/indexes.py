@@ -0,0 +1,198 @@
+# Declarative index registry, bootstrap and coverage checks
+import logging
+from typing import Any, Dict, List
+
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+# Indexes every collection is expected to have, keyed by collection name.
+# Names are explicit so drift can be detected by comparing specs by name.
+INDEXES: Dict[str, List[Dict[str, Any]]] = {
+    "products": [
+        # Seeded products have no `id` field, so the unique index is sparse
+        {"name": "id_unique", "keys": [("id", 1)], "unique": True, "sparse": True},
+        # Category listing and keyset pagination on (categoryId, _id)
+        {"name": "categoryId_id", "keys": [("categoryId", 1), ("_id", 1)]},
+        # Seed migrations and id-less import rows upsert on (categoryId, name)
+        {"name": "categoryId_name", "keys": [("categoryId", 1), ("name", 1)]},
+        # Listing filters: equality on category (and delivery flag) before ranges
+        {"name": "categoryId_price", "keys": [("categoryId", 1), ("price", 1)]},
+        {"name": "categoryId_rating", "keys": [("categoryId", 1), ("rating", -1)]},
+        {"name": "categoryId_discount", "keys": [("categoryId", 1), ("discount", -1)]},
+        {"name": "categoryId_fastDelivery_price", "keys": [("categoryId", 1), ("fastDelivery", 1), ("price", 1)]},
+    ],
+    "users": [
+        {"name": "email_unique", "keys": [("email", 1)], "unique": True},
+        {"name": "id_unique", "keys": [("id", 1)], "unique": True},
+    ],
+    "orders": [
+        {"name": "id_unique", "keys": [("id", 1)], "unique": True},
+        # Order history, newest first, with _id as the keyset tie-breaker
+        {"name": "userId_createdAt_id", "keys": [("userId", 1), ("createdAt", -1), ("_id", -1)]},
+    ],
+    "carts": [
+        # One cart per user; also makes concurrent cart upserts collide safely
+        {"name": "userId_unique", "keys": [("userId", 1)], "unique": True},
+    ],
+    "inventory": [
+        {"name": "productId_shard_unique", "keys": [("productId", 1), ("shard", 1)], "unique": True},
+    ],
+    "reservations": [
+        {"name": "id_unique", "keys": [("id", 1)], "unique": True},
+        # Reaper scan for holds past their expiry
+        {"name": "status_expiresAt", "keys": [("status", 1), ("expiresAt", 1)]},
+        # Closed reservations are purged after a week; open ones have no closedAt
+        {"name": "closedAt_ttl", "keys": [("closedAt", 1)], "expireAfterSeconds": 7 * 24 * 3600},
+    ],
+    "categories": [
+        {"name": "id_unique", "keys": [("id", 1)], "unique": True},
+    ],
+}
+
+# Hot queries issued by server.py, checked with explain for index coverage
+HOT_QUERIES: List[Dict[str, Any]] = [
+    {"name": "get_product", "collection": "products", "filter": {"id": "x"}},
+    {"name": "get_products_by_category", "collection": "products", "filter": {"categoryId": 1}},
+    {
+        "name": "get_products_page",
+        "collection": "products",
+        "filter": {"categoryId": 1},
+        "sort": {"categoryId": 1, "_id": 1},
+    },
+    {
+        "name": "get_products_price_filter",
+        "collection": "products",
+        "filter": {"categoryId": 1, "price": {"$gte": 500, "$lte": 5000}},
+    },
+    {"name": "home_top_rated", "collection": "products", "filter": {"categoryId": 1}, "sort": {"rating": -1}},
+    {"name": "home_top_discount", "collection": "products", "filter": {"categoryId": 1}, "sort": {"discount": -1}},
+    {"name": "login", "collection": "users", "filter": {"email": "x@example.com"}},
+    {"name": "auth_me", "collection": "users", "filter": {"id": "x"}},
+    {
+        "name": "get_user_orders",
+        "collection": "orders",
+        "filter": {"userId": "x"},
+        "sort": {"createdAt": -1, "_id": -1},
+    },
+    {"name": "get_order", "collection": "orders", "filter": {"id": "x", "userId": "x"}},
+    {"name": "get_cart", "collection": "carts", "filter": {"userId": "x"}},
+]
+
+# Options compared when checking an existing index against its declaration
+_COMPARED_OPTIONS = ("unique", "sparse", "partialFilterExpression", "expireAfterSeconds")
+
+
+def _index_options(spec: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: spec[key] for key in _COMPARED_OPTIONS if spec.get(key)}
+
+
+def _describe_drift(declared: Dict[str, Any], actual: Dict[str, Any]) -> List[str]:
+    problems = []
+    if [tuple(k) for k in declared["keys"]] != [tuple(k) for k in actual["key"]]:
+        problems.append(f"keys {actual['key']} != declared {declared['keys']}")
+    declared_options = _index_options(declared)
+    actual_options = _index_options(actual)
+    if declared_options != actual_options:
+        problems.append(f"options {actual_options} != declared {declared_options}")
+    return problems
+
+
+async def ensure_indexes(db) -> Dict[str, List[str]]:
+    """Create declared indexes that are missing and log any drift.
+
+    Safe to run on every startup: existing indexes that match are left
+    alone, and mismatched or undeclared ones are reported, never dropped.
+    Returns the names of indexes created per collection.
+    """
+    created: Dict[str, List[str]] = {}
+    for collection_name, specs in INDEXES.items():
+        collection = db[collection_name]
+        existing = await collection.index_information()
+
+        for spec in specs:
+            name = spec["name"]
+            if name in existing:
+                for problem in _describe_drift(spec, existing[name]):
+                    logger.warning(f"Index drift on {collection_name}.{name}: {problem}")
+                continue
+
+            options = {key: value for key, value in spec.items() if key not in ("name", "keys")}
+            try:
+                await collection.create_index(spec["keys"], name=name, **options)
+                created.setdefault(collection_name, []).append(name)
+                logger.info(f"Created index {collection_name}.{name}")
+            except OperationFailure as e:
+                logger.error(f"Could not create index {collection_name}.{name}: {e}")
+
+        declared_names = {spec["name"] for spec in specs}
+        for name in existing:
+            if name != "_id_" and name not in declared_names:
+                logger.warning(f"Undeclared index {collection_name}.{name}")
+
+    return created
+
+
+def _plan_stages(plan: Any) -> List[str]:
+    """Collect every stage name in an explain plan tree"""
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(_plan_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(_plan_stages(item))
+    return stages
+
+
+async def explain_query(db, query: Dict[str, Any]) -> Dict[str, Any]:
+    """Explain a single hot query and report whether an index serves it"""
+    command = {"find": query["collection"], "filter": query.get("filter", {})}
+    if query.get("sort"):
+        command["sort"] = query["sort"]
+    result = await db.command({"explain": command, "verbosity": "queryPlanner"})
+    stages = _plan_stages(result["queryPlanner"]["winningPlan"])
+    return {
+        "name": query["name"],
+        "collection": query["collection"],
+        "stages": stages,
+        "covered": "COLLSCAN" not in stages and "SORT" not in stages,
+    }
+
+
+async def verify_query_coverage(db) -> List[Dict[str, Any]]:
+    """Explain every hot query; queries needing a scan or in-memory sort are flagged"""
+    reports = []
+    for query in HOT_QUERIES:
+        report = await explain_query(db, query)
+        if not report["covered"]:
+            logger.warning(f"Query {report['name']} is not index-covered: {report['stages']}")
+        reports.append(report)
+    return reports
+
+
+if __name__ == "__main__":
+    import asyncio
+    import os
+    from pathlib import Path
+
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(Path(__file__).parent / '.env')
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+
+    async def main():
+        client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+        db = client[os.environ['DB_NAME']]
+        await ensure_indexes(db)
+        reports = await verify_query_coverage(db)
+        for report in reports:
+            mark = "OK " if report["covered"] else "SCAN"
+            print(f"{mark} {report['name']:<28} {' > '.join(report['stages'])}")
+        client.close()
+        return all(report["covered"] for report in reports)
+
+    raise SystemExit(0 if asyncio.run(main()) else 1)
@@ -0,0 +1,258 @@
+# Stock counters with atomic conditional decrements and expiring reservations
+import logging
+import random
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import ReturnDocument, UpdateOne
+
+logger = logging.getLogger(__name__)
+
+# Shard recorded in an allocation for a product that has no stock counters
+UNTRACKED = -1
+
+
+class OutOfStockError(Exception):
+    def __init__(self, product_id: str):
+        super().__init__(f"Insufficient stock for product {product_id}")
+        self.product_id = product_id
+
+
+class ReservationError(Exception):
+    """The reservation is unknown, already closed, or has expired"""
+
+
+class Inventory:
+    """Stock counters split into one or more shard documents per product.
+
+    A reservation decrements a shard only if it still has enough units
+    (``available >= quantity`` in the update filter), so stock can never go
+    negative and nothing is oversold. Spreading a hot product over several
+    shards lets concurrent checkouts update different documents instead of
+    queueing on one. A line is served from one shard when any shard holds
+    enough; otherwise it is gathered from several, one allocation per shard,
+    so units left scattered across shards can still be sold.
+
+    Products without any counter are not tracked and are always available,
+    matching the static ``inStock`` flag they had before.
+    """
+
+    def __init__(self, stock_collection, reservations_collection, reservation_ttl: float = 900.0):
+        self.stock = stock_collection
+        self.reservations = reservations_collection
+        self.reservation_ttl = reservation_ttl
+
+    async def _shards(self, product_ids: List[str]) -> Dict[str, Dict[int, int]]:
+        """Units per shard for every tracked product in ``product_ids``, in one query.
+
+        Untracked products are absent from the result. Shard layouts are read
+        on every reservation, so a re-shard done by another worker is seen
+        immediately.
+        """
+        shards: Dict[str, Dict[int, int]] = {}
+        cursor = self.stock.find(
+            {"productId": {"$in": product_ids}}, {"_id": 0, "productId": 1, "shard": 1, "available": 1}
+        )
+        async for doc in cursor:
+            shards.setdefault(doc["productId"], {})[doc["shard"]] = doc["available"]
+        return shards
+
+    async def held(self, product_id: str) -> int:
+        """Units of a product in reservations that are still held"""
+        pipeline = [
+            {"$match": {"status": "held", "allocations.productId": product_id}},
+            {"$unwind": "$allocations"},
+            {"$match": {"allocations.productId": product_id}},
+            {"$group": {"_id": None, "units": {"$sum": "$allocations.quantity"}}},
+        ]
+        async for doc in self.reservations.aggregate(pipeline):
+            return doc["units"]
+        return 0
+
+    async def set_stock(self, product_id: str, quantity: int, shards: int = 1):
+        """Set a product's units on hand, spread evenly over ``shards`` counters.
+
+        ``quantity`` includes units in held reservations: those are subtracted
+        from the counters now, since releasing a hold adds its units back.
+        Counters go negative when more is held than is on hand, which keeps
+        the product unsellable until enough holds are released. Reservations
+        taken while this runs are not accounted for.
+        """
+        shards = max(1, shards)
+        base, extra = divmod(quantity - await self.held(product_id), shards)
+        ops = [
+            UpdateOne(
+                {"productId": product_id, "shard": shard},
+                {"$set": {"available": base + (1 if shard < extra else 0)}},
+                upsert=True,
+            )
+            for shard in range(shards)
+        ]
+        await self.stock.bulk_write(ops, ordered=False)
+        await self.stock.delete_many({"productId": product_id, "shard": {"$gte": shards}})
+
+    async def available(self, product_id: str) -> Optional[int]:
+        """Units left across all shards, or None if the product is untracked"""
+        total = None
+        async for doc in self.stock.find({"productId": product_id}, {"available": 1}):
+            total = (total or 0) + doc["available"]
+        return total if total is None else max(0, total)
+
+    async def _take(self, product_id: str, quantity: int, shards: Dict[int, int]) -> Optional[List[dict]]:
+        """Decrement shards by quantity in total; returns the allocations, or None if short.
+
+        ``shards`` is the product's units per shard as read by _shards; it
+        only steers which counters are tried, the decrements themselves
+        are conditional on the live values.
+        """
+        if not shards:
+            return [{"productId": product_id, "shard": UNTRACKED, "quantity": quantity}]
+
+        # Try one random shard that looked big enough, so concurrent checkouts
+        # land on different documents, then any of the others in one query
+        candidates = [shard for shard, available in shards.items() if available >= quantity]
+        random.shuffle(candidates)
+        shard_filters = candidates[:1]
+        if len(candidates) > 1:
+            shard_filters.append({"$in": candidates[1:]})
+        for shard_filter in shard_filters:
+            doc = await self.stock.find_one_and_update(
+                {"productId": product_id, "shard": shard_filter, "available": {"$gte": quantity}},
+                {"$inc": {"available": -quantity}},
+                projection={"shard": 1, "_id": 0},
+            )
+            if doc is not None:
+                return [{"productId": product_id, "shard": doc["shard"], "quantity": quantity}]
+
+        if len(shards) == 1 or sum(max(0, available) for available in shards.values()) < quantity:
+            return None
+        return await self._take_split(product_id, quantity, shards)
+
+    async def _take_split(self, product_id: str, quantity: int, shards: Dict[int, int]) -> Optional[List[dict]]:
+        # No shard holds the whole line: take what each shard has, fullest
+        # first, in one atomic pipeline update per shard until it is covered
+        allocations = []
+        remaining = quantity
+        stocked = [shard for shard, available in shards.items() if available > 0]
+        for shard in sorted(stocked, key=shards.get, reverse=True):
+            doc = await self.stock.find_one_and_update(
+                {"productId": product_id, "shard": shard, "available": {"$gt": 0}},
+                [{"$set": {"available": {"$max": [0, {"$subtract": ["$available", remaining]}]}}}],
+                projection={"available": 1, "_id": 0},
+                return_document=ReturnDocument.BEFORE,
+            )
+            if doc is None:
+                continue
+            taken = min(doc["available"], remaining)
+            allocations.append({"productId": product_id, "shard": shard, "quantity": taken})
+            remaining -= taken
+            if remaining == 0:
+                return allocations
+
+        await self._give_back(allocations)
+        return None
+
+    async def _give_back(self, allocations: List[dict]):
+        # Upserts recreate a shard that set_stock removed while it was held,
+        # so the units come back instead of being lost
+        ops = [
+            UpdateOne(
+                {"productId": allocation["productId"], "shard": allocation["shard"]},
+                {"$inc": {"available": allocation["quantity"]}},
+                upsert=True,
+            )
+            for allocation in allocations
+            if allocation["shard"] != UNTRACKED
+        ]
+        if ops:
+            await self.stock.bulk_write(ops, ordered=False)
+
+    async def reserve(self, user_id: str, items: List[Tuple[str, int]]) -> dict:
+        """Hold stock for every (productId, quantity) or for none of them.
+
+        The reservation expires after ``reservation_ttl`` seconds unless it is
+        committed; expired holds are returned to stock by release_expired.
+        """
+        # One read resolves every line's shards; untracked lines need no write
+        shards = await self._shards([product_id for product_id, _ in items])
+        allocations = []
+        try:
+            for product_id, quantity in items:
+                taken = await self._take(product_id, quantity, shards.get(product_id, {}))
+                if taken is None:
+                    raise OutOfStockError(product_id)
+                allocations.extend(taken)
+        except Exception:
+            await self._give_back(allocations)
+            raise
+
+        now = datetime.utcnow()
+        reservation = {
+            "id": str(uuid.uuid4()),
+            "userId": user_id,
+            "allocations": allocations,
+            "status": "held",
+            "createdAt": now,
+            "expiresAt": now + timedelta(seconds=self.reservation_ttl),
+        }
+        try:
+            await self.reservations.insert_one(reservation)
+        except Exception:
+            await self._give_back(allocations)
+            raise
+        reservation.pop("_id", None)
+        return reservation
+
+    async def get(self, reservation_id: str, user_id: str) -> Optional[dict]:
+        return await self.reservations.find_one({"id": reservation_id, "userId": user_id}, {"_id": 0})
+
+    async def commit(self, reservation_id: str, user_id: str, order_id: str) -> dict:
+        """Turn a live hold into a sale; fails if it expired or was released"""
+        now = datetime.utcnow()
+        reservation = await self.reservations.find_one_and_update(
+            {"id": reservation_id, "userId": user_id, "status": "held", "expiresAt": {"$gt": now}},
+            {"$set": {"status": "committed", "orderId": order_id, "closedAt": now}},
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER,
+        )
+        if reservation is None:
+            raise ReservationError("Reservation expired or not found")
+        return reservation
+
+    async def release(self, reservation_id: str, user_id: Optional[str] = None) -> bool:
+        """Cancel a hold and return its units to stock"""
+        query = {"id": reservation_id, "status": "held"}
+        if user_id is not None:
+            query["userId"] = user_id
+        return await self._release_one(query)
+
+    async def _release_one(self, query: dict) -> bool:
+        # Flipping the status first means only one caller ever gives stock back
+        reservation = await self.reservations.find_one_and_update(
+            query,
+            {"$set": {"status": "released", "closedAt": datetime.utcnow()}},
+            projection={"allocations": 1},
+        )
+        if reservation is None:
+            return False
+        await self._give_back(reservation["allocations"])
+        return True
+
+    async def release_expired(self, limit: int = 1000) -> int:
+        """Return stock held by reservations whose TTL passed without payment"""
+        released = 0
+        while released < limit:
+            if not await self._release_one({"status": "held", "expiresAt": {"$lte": datetime.utcnow()}}):
+                break
+            released += 1
+        if released:
+            logger.info(f"Released {released} expired stock reservations")
+        return released
+
+
+def reserved_quantities(reservation: dict) -> Dict[str, int]:
+    quantities: Dict[str, int] = {}
+    for allocation in reservation.get("allocations", []):
+        quantities[allocation["productId"]] = quantities.get(allocation["productId"], 0) + allocation["quantity"]
+    return quantities
@@ -0,0 +1,195 @@
+# Prometheus-style request metrics and Mongo connection pool statistics
+import bisect
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+
+from pymongo import monitoring
+
+# Latency bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelKey = Tuple[str, str, str]
+
+
+class Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        # One slot per bucket plus +Inf; cumulated only when rendered
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsRegistry:
+    """Request metrics, updated from the event loop thread only"""
+
+    def __init__(self):
+        self.latency: Dict[LabelKey, Histogram] = {}
+        self.in_flight = 0
+        self._collectors: List[Callable[[], List[str]]] = []
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float):
+        key = (method, route, str(status))
+        histogram = self.latency.get(key)
+        if histogram is None:
+            histogram = self.latency[key] = Histogram()
+        histogram.observe(seconds)
+
+    def register_collector(self, collector: Callable[[], List[str]]):
+        """Add a callable returning extra exposition lines at scrape time"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = [
+            "# HELP http_request_duration_seconds Request latency by route and status",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route, status), histogram in sorted(self.latency.items()):
+            labels = f'method="{method}",route="{_escape(route)}",status="{status}"'
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, histogram.counts):
+                cumulative += count
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {histogram.total}")
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {histogram.count}")
+
+        lines.append("# HELP http_requests_in_flight Requests currently being served")
+        lines.append("# TYPE http_requests_in_flight gauge")
+        lines.append(f"http_requests_in_flight {self.in_flight}")
+
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: two clock reads and a dict lookup per request.
+
+    The route label is the matched path template (e.g.
+    ``/api/products/{product_id}``), so label cardinality stays bounded.
+    """
+
+    def __init__(self, app, registry: MetricsRegistry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        registry = self.registry
+        registry.in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            registry.in_flight -= 1
+            # The router stores the matched route in the shared scope
+            route = scope.get("route")
+            registry.observe_request(
+                scope["method"], route.path if route is not None else "unmatched", status_code, elapsed
+            )
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Mongo connection pool counters; pymongo calls these from its own threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.open = 0
+        self.checked_out = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.cleared = 0
+
+    def _add(self, field: str, delta: int = 1):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + delta)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._add("cleared")
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._add("open")
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._add("open", -1)
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._add("checkout_failures")
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.checked_out += 1
+            self.checkouts += 1
+
+    def connection_checked_in(self, event):
+        self._add("checked_out", -1)
+
+    def collect(self) -> List[str]:
+        return [
+            "# HELP mongo_pool_connections Open connections in the Mongo pool",
+            "# TYPE mongo_pool_connections gauge",
+            f"mongo_pool_connections {self.open}",
+            "# HELP mongo_pool_checked_out Connections currently checked out",
+            "# TYPE mongo_pool_checked_out gauge",
+            f"mongo_pool_checked_out {self.checked_out}",
+            "# TYPE mongo_pool_checkouts_total counter",
+            f"mongo_pool_checkouts_total {self.checkouts}",
+            "# TYPE mongo_pool_checkout_failures_total counter",
+            f"mongo_pool_checkout_failures_total {self.checkout_failures}",
+            "# TYPE mongo_pool_cleared_total counter",
+            f"mongo_pool_cleared_total {self.cleared}",
+        ]
+
+
+def cache_collector(name: str, stats: Callable[[], dict]) -> Callable[[], List[str]]:
+    """Expose a cache's stats() hit/miss/size figures"""
+    def collect() -> List[str]:
+        values = stats()
+        return [
+            f"# TYPE {name}_hits_total counter",
+            f"{name}_hits_total {values['hits']}",
+            f"# TYPE {name}_misses_total counter",
+            f"{name}_misses_total {values['misses']}",
+            f"# TYPE {name}_size gauge",
+            f"{name}_size {values['size']}",
+        ]
+    return collect
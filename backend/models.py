@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, EmailStr
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Union
 from datetime import datetime
 import uuid
 
@@ -38,6 +38,29 @@ class ProductCreate(BaseModel):
     inStock: bool = True
     fastDelivery: bool = False
 
+class ProductPage(BaseModel):
+    items: List[Product]
+    next_cursor: Optional[str] = None
+    facets: Optional[Dict[str, Union[int, Dict[str, int]]]] = None
+
+class ProductBatchRequest(BaseModel):
+    ids: List[str]
+
+class ProductBatchResponse(BaseModel):
+    products: List[Product]
+    missing: List[str] = []
+
+class ProductCard(BaseModel):
+    id: str
+    name: str
+    price: float
+    originalPrice: float
+    discount: int
+    rating: float
+    reviews: int
+    image: str
+    fastDelivery: bool = False
+
 # Category Models
 class Category(BaseModel):
     id: int
@@ -45,6 +68,9 @@ class Category(BaseModel):
     icon: str
     image: str
 
+class HomeSection(Category):
+    products: Dict[str, List[ProductCard]]  # One row per requested sort key
+
 # User Models
 class User(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -80,6 +106,11 @@ class OrderItem(BaseModel):
     price: float
     quantity: int
 
+class OrderLine(BaseModel):
+    """A requested order line; name, image and price come from the catalog"""
+    productId: str
+    quantity: int
+
 class ShippingAddress(BaseModel):
     fullName: str
     phone: str
@@ -100,12 +131,44 @@ class Order(BaseModel):
     createdAt: datetime = Field(default_factory=datetime.utcnow)
     updatedAt: datetime = Field(default_factory=datetime.utcnow)
 
-class OrderCreate(BaseModel):
-    items: List[OrderItem]
+class OrderSummary(BaseModel):
+    id: str
+    status: str
     totalAmount: float
+    itemCount: int
+    thumbnail: Optional[str] = None
+    createdAt: datetime
+
+class OrderPage(BaseModel):
+    items: List[Union[OrderSummary, Order]]
+    next_cursor: Optional[str] = None
+
+class OrderCreate(BaseModel):
+    items: List[OrderLine]
+    totalAmount: Optional[float] = None  # Ignored; the server reprices the order
     shippingAddress: ShippingAddress
     paymentMethod: str
     paymentId: Optional[str] = None
+    reservationId: Optional[str] = None  # Stock hold from /checkout/reserve
+
+# Cart Models
+class CartItem(BaseModel):
+    productId: str
+    quantity: int = 1
+
+class CartItemUpdate(BaseModel):
+    quantity: int
+
+class CartMerge(BaseModel):
+    items: List[CartItem]
+
+# Inventory Models
+class StockUpdate(BaseModel):
+    quantity: int
+    shards: int = 1
+
+class ReservationCreate(BaseModel):
+    items: List[CartItem]
 
 # Payment Models
 class PaymentOrderCreate(BaseModel):
@@ -0,0 +1,141 @@
+# Mongo command monitoring and slow-query log with automatic explain
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import monitoring
+
+from indexes import _plan_stages
+from metrics import _escape
+
+logger = logging.getLogger(__name__)
+slow_logger = logging.getLogger("mongo.slow")
+
+# Route template of the request issuing the current Mongo commands. Motor
+# copies the context into its executor threads, so listeners can read it.
+current_route: contextvars.ContextVar[str] = contextvars.ContextVar("current_route", default="background")
+
+# Commands that accept explain, and the keys pymongo adds that explain rejects
+EXPLAINABLE = {"find", "aggregate", "count", "distinct", "update", "delete", "findAndModify"}
+_SESSION_KEYS = {"lsid", "txnNumber", "autocommit", "startTransaction", "readConcern", "writeConcern"}
+
+# Do not explain the same (command, collection, route) more than once per interval
+EXPLAIN_INTERVAL = 60.0
+
+
+class CommandMonitor(monitoring.CommandListener):
+    """Per-command latency by originating route, plus a slow-query log.
+
+    Commands slower than ``slow_ms`` are handed to the event loop, which
+    runs a queryPlanner explain on them and logs the winning plan, so
+    collection scans show up with the route that caused them.
+    """
+
+    def __init__(self, slow_ms: float = 100.0, keep: int = 200):
+        self.slow_ms = slow_ms
+        self.recent_slow: deque = deque(maxlen=keep)
+        self._lock = threading.Lock()
+        self._started: Dict[int, Tuple[str, Optional[dict]]] = {}
+        # (command, route) -> [count, total micros, max micros]
+        self.stats: Dict[Tuple[str, str], List[int]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._last_explained: Dict[Tuple[str, str, str], float] = {}
+
+    def attach(self, loop: asyncio.AbstractEventLoop, db) -> asyncio.Task:
+        """Start explaining slow commands on ``loop`` against ``db``"""
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=1000)
+        return loop.create_task(self._explain_worker(db))
+
+    def started(self, event):
+        if event.command_name == "explain":
+            return
+        command = None
+        if event.command_name in EXPLAINABLE:
+            command = {
+                key: value for key, value in event.command.items()
+                if not key.startswith("$") and key not in _SESSION_KEYS
+            }
+        with self._lock:
+            self._started[event.request_id] = (current_route.get(), command)
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event)
+
+    def _finish(self, event):
+        with self._lock:
+            started = self._started.pop(event.request_id, None)
+            if started is None:
+                return
+            route, command = started
+            key = (event.command_name, route)
+            entry = self.stats.get(key)
+            if entry is None:
+                entry = self.stats[key] = [0, 0, 0]
+            entry[0] += 1
+            entry[1] += event.duration_micros
+            if event.duration_micros > entry[2]:
+                entry[2] = event.duration_micros
+
+        if event.duration_micros >= self.slow_ms * 1000 and self._loop is not None:
+            record = {
+                "command": event.command_name,
+                "database": event.database_name,
+                "route": route,
+                "duration_ms": event.duration_micros / 1000,
+                "at": time.time(),
+            }
+            self._loop.call_soon_threadsafe(self._enqueue, record, command)
+
+    def _enqueue(self, record: dict, command: Optional[dict]):
+        try:
+            self._queue.put_nowait((record, command))
+        except asyncio.QueueFull:
+            pass
+
+    async def _explain_worker(self, db):
+        while True:
+            record, command = await self._queue.get()
+            if command is not None:
+                collection = str(command.get(record["command"]))
+                record["collection"] = collection
+                record["filter"] = command.get("filter", command.get("query", command.get("pipeline")))
+                explain_key = (record["command"], collection, record["route"])
+                now = time.monotonic()
+                if now - self._last_explained.get(explain_key, 0.0) >= EXPLAIN_INTERVAL:
+                    self._last_explained[explain_key] = now
+                    try:
+                        plan = await db.command({"explain": command, "verbosity": "queryPlanner"})
+                        stages = _plan_stages(plan.get("queryPlanner", {}).get("winningPlan", plan.get("stages")))
+                        record["plan"] = stages
+                        record["collscan"] = "COLLSCAN" in stages
+                    except Exception as e:
+                        record["explain_error"] = str(e)
+            self.recent_slow.append(record)
+            slow_logger.warning(
+                f"Slow {record['command']} on {record.get('collection', '?')} from {record['route']}: "
+                f"{record['duration_ms']:.1f} ms, plan={record.get('plan')}"
+            )
+
+    def collect(self) -> List[str]:
+        """Prometheus lines for per-command, per-route latency"""
+        lines = [
+            "# HELP mongo_command_duration_seconds Mongo command latency by originating route",
+            "# TYPE mongo_command_duration_seconds summary",
+        ]
+        with self._lock:
+            items = sorted((key, list(value)) for key, value in self.stats.items())
+        for (command, route), (count, total, longest) in items:
+            labels = f'command="{command}",route="{_escape(route)}"'
+            lines.append(f"mongo_command_duration_seconds_sum{{{labels}}} {total / 1e6}")
+            lines.append(f"mongo_command_duration_seconds_count{{{labels}}} {count}")
+            lines.append(f"mongo_command_duration_seconds_max{{{labels}}} {longest / 1e6}")
+        return lines
@@ -0,0 +1,104 @@
+# Async Razorpay gateway adapter
+import asyncio
+import hashlib
+import hmac
+import logging
+import random
+from typing import Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+RAZORPAY_API_URL = "https://api.razorpay.com/v1"
+
+# Upstream responses worth retrying; anything else is returned as an error
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class PaymentGatewayError(Exception):
+    """Razorpay could not be reached or rejected the request"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class RazorpayGateway:
+    """Non-blocking Razorpay client.
+
+    Requests go through one pooled ``httpx.AsyncClient`` with per-call
+    timeouts, and transient failures are retried with exponential backoff
+    and full jitter. Signature verification is a local HMAC and never
+    touches the network.
+    """
+
+    def __init__(
+        self,
+        key_id: str,
+        key_secret: str,
+        base_url: str = RAZORPAY_API_URL,
+        timeout: float = 10.0,
+        connect_timeout: float = 3.0,
+        max_retries: int = 2,
+        backoff_base: float = 0.2,
+        max_connections: int = 50,
+    ):
+        self.key_id = key_id
+        self._key_secret = key_secret.encode()
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            auth=(key_id, key_secret),
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        )
+
+    async def _request(self, method: str, path: str, **kwargs) -> dict:
+        attempt = 0
+        while True:
+            try:
+                response = await self._client.request(method, path, **kwargs)
+                if response.status_code not in RETRYABLE_STATUS:
+                    if response.is_error:
+                        raise PaymentGatewayError(
+                            f"Razorpay returned {response.status_code}: {response.text}",
+                            status_code=response.status_code,
+                        )
+                    return response.json()
+                error = PaymentGatewayError(
+                    f"Razorpay returned {response.status_code}", status_code=response.status_code
+                )
+            except httpx.TransportError as e:
+                error = PaymentGatewayError(f"Razorpay request failed: {e!r}")
+
+            if attempt >= self.max_retries:
+                raise error
+            # Full jitter keeps retrying workers from synchronising
+            delay = random.uniform(0, self.backoff_base * (2 ** attempt))
+            attempt += 1
+            logger.warning(f"{error}; retry {attempt}/{self.max_retries} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    async def create_order(self, amount: int, currency: str = "INR", receipt: Optional[str] = None) -> dict:
+        """Create an order for ``amount`` in the smallest currency unit.
+
+        A retried create can leave an extra unpaid order behind if the first
+        attempt reached Razorpay; unpaid orders simply expire there.
+        """
+        payload = {"amount": amount, "currency": currency, "payment_capture": 1}
+        if receipt:
+            payload["receipt"] = receipt
+        return await self._request("POST", "/orders", json=payload)
+
+    def verify_payment_signature(self, order_id: str, payment_id: str, signature: str) -> bool:
+        message = f"{order_id}|{payment_id}".encode()
+        expected = hmac.new(self._key_secret, message, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(expected, signature)
+
+    async def aclose(self):
+        await self._client.aclose()
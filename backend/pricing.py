@@ -0,0 +1,62 @@
+# Server-side repricing of order lines
+from typing import Dict, List, Tuple
+
+from models import OrderItem, OrderLine
+
+# Only the fields needed to price and describe an order line
+PRICING_PROJECTION = {"id": 1, "name": 1, "image": 1, "price": 1, "inStock": 1}
+
+
+class PricingError(Exception):
+    """One or more order lines cannot be fulfilled as requested"""
+
+    def __init__(self, missing: List[str], out_of_stock: List[str], invalid: List[str]):
+        self.missing = missing
+        self.out_of_stock = out_of_stock
+        self.invalid = invalid
+        problems = []
+        if missing:
+            problems.append(f"no longer available: {', '.join(missing)}")
+        if out_of_stock:
+            problems.append(f"out of stock: {', '.join(out_of_stock)}")
+        if invalid:
+            problems.append(f"invalid quantity: {', '.join(invalid)}")
+        if problems:
+            super().__init__("Some items cannot be ordered (" + "; ".join(problems) + ")")
+        else:
+            super().__init__("Order has no items")
+
+
+def price_order(items: List[OrderLine], products: Dict[str, dict]) -> Tuple[List[OrderItem], float]:
+    """Rebuild order lines from current catalog data and total them.
+
+    Name, image and price always come from the catalog, never from the
+    client. Every problem across all lines is collected and reported in one
+    PricingError so the client can fix the whole cart at once.
+    """
+    missing, out_of_stock, invalid = [], [], []
+    priced = []
+    for item in items:
+        product = products.get(item.productId)
+        if product is None:
+            missing.append(item.productId)
+            continue
+        if item.quantity <= 0:
+            invalid.append(product["name"])
+            continue
+        if not product.get("inStock", True):
+            out_of_stock.append(product["name"])
+            continue
+        priced.append(OrderItem(
+            productId=item.productId,
+            name=product["name"],
+            image=product["image"],
+            price=product["price"],
+            quantity=item.quantity,
+        ))
+
+    if missing or out_of_stock or invalid or not priced:
+        raise PricingError(missing, out_of_stock, invalid)
+
+    total = round(sum(line.price * line.quantity for line in priced), 2)
+    return priced, total
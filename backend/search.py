@@ -0,0 +1,258 @@
+# In-process inverted index for product search
+import asyncio
+import bisect
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Field weights used when scoring a match
+FIELD_WEIGHTS = {
+    "name": 3.0,
+    "category": 2.0,
+    "description": 1.0,
+}
+
+# Minimum length before the last query token is treated as a prefix
+MIN_PREFIX_LENGTH = 2
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase and strip accents so 'Café' and 'cafe' index the same"""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return text.lower()
+
+
+def stem(token: str) -> str:
+    """Light suffix stripping so plurals and simple verb forms share a term"""
+    if len(token) <= 3 or token.isdigit():
+        return token
+    if token.endswith("ies") and len(token) > 4:
+        return token[:-3] + "y"
+    if token.endswith(("sses", "ches", "shes")):
+        return token[:-2]
+    if token.endswith("es") and token[-3] in "sxz":
+        return token[:-2]
+    if token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    if token.endswith("ing") and len(token) > 5:
+        return _undouble(token[:-3])
+    if token.endswith("ed") and len(token) > 4:
+        return _undouble(token[:-2])
+    return token
+
+
+def _undouble(token: str) -> str:
+    # "running" -> "runn" -> "run"
+    if len(token) > 2 and token[-1] == token[-2] and token[-1] not in "aeioulsz":
+        return token[:-1]
+    return token
+
+
+def surface_tokens(text: Optional[str]) -> List[str]:
+    """Split text into normalized, unstemmed tokens"""
+    if not text:
+        return []
+    return _TOKEN_RE.findall(normalize(text))
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Split text into normalized, stemmed terms"""
+    return [stem(token) for token in surface_tokens(text)]
+
+
+class SearchIndex:
+    """Inverted index over product name, category and description.
+
+    Posting lists map each term to the documents containing it together with
+    a field-weighted score. Documents are keyed by the string form of their
+    Mongo ``_id`` so results can be hydrated with a single ``$in`` query.
+
+    A second set of postings keyed by unstemmed tokens serves prefix
+    matching: stems are not prefixes of every spelling ("running" stems to
+    "run", so "runni" would otherwise match nothing).
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[str, float]] = defaultdict(dict)
+        self._surface_postings: Dict[str, Dict[str, float]] = defaultdict(dict)
+        self._doc_terms: Dict[str, Tuple[List[str], List[str]]] = {}
+        self._vocabulary: List[str] = []
+        self._vocabulary_dirty = False
+
+    def __len__(self):
+        return len(self._doc_terms)
+
+    @staticmethod
+    def doc_key(doc: dict) -> str:
+        return str(doc["_id"])
+
+    def add(self, doc: dict):
+        """Index a product document, replacing any previous version"""
+        key = self.doc_key(doc)
+        if key in self._doc_terms:
+            self.remove(key)
+
+        scores: Dict[str, float] = defaultdict(float)
+        surface_scores: Dict[str, float] = defaultdict(float)
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in surface_tokens(doc.get(field)):
+                scores[stem(token)] += weight
+                surface_scores[token] += weight
+
+        for term, score in scores.items():
+            self._postings[term][key] = score
+        for token, score in surface_scores.items():
+            postings = self._surface_postings[token]
+            if not postings:
+                self._vocabulary_dirty = True
+            postings[key] = score
+        self._doc_terms[key] = (list(scores), list(surface_scores))
+
+    def add_many(self, docs: Iterable[dict]):
+        for doc in docs:
+            self.add(doc)
+
+    def remove(self, key: str):
+        """Drop a document from every posting list it appears in"""
+        terms, tokens = self._doc_terms.pop(str(key), ([], []))
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(str(key), None)
+            if not postings:
+                del self._postings[term]
+        for token in tokens:
+            postings = self._surface_postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(str(key), None)
+            if not postings:
+                del self._surface_postings[token]
+                self._vocabulary_dirty = True
+
+    def clear(self):
+        self._postings.clear()
+        self._surface_postings.clear()
+        self._doc_terms.clear()
+        self._vocabulary = []
+        self._vocabulary_dirty = False
+
+    def replace(self, other: "SearchIndex"):
+        """Take over the contents of another index in one step"""
+        self._postings = other._postings
+        self._surface_postings = other._surface_postings
+        self._doc_terms = other._doc_terms
+        self._vocabulary = other._vocabulary
+        self._vocabulary_dirty = True
+
+    def _expand_prefix(self, prefix: str) -> List[str]:
+        if self._vocabulary_dirty:
+            self._vocabulary = sorted(self._surface_postings)
+            self._vocabulary_dirty = False
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        end = bisect.bisect_left(self._vocabulary, prefix + "\uffff")
+        return self._vocabulary[start:end]
+
+    def _prefix_matches(self, prefix: str) -> Dict[str, float]:
+        if len(prefix) < MIN_PREFIX_LENGTH:
+            return {}
+        merged: Dict[str, float] = {}
+        for term in self._expand_prefix(prefix):
+            for key, score in self._surface_postings[term].items():
+                # Prefix hits rank below exact hits on the same field
+                weight = score * 0.5
+                if weight > merged.get(key, 0.0):
+                    merged[key] = weight
+        return merged
+
+    def search(self, query: str, limit: int = 100) -> List[str]:
+        """Return document keys matching every query term, best first.
+
+        The last term is also matched as a prefix of indexed terms so
+        results keep up with the user while they type.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        # Prefix expansion matches the unstemmed last token against unstemmed
+        # indexed tokens, so every keystroke of "running" keeps matching
+        raw_last = surface_tokens(query)[-1]
+        candidates: List[Dict[str, float]] = []
+        for i, term in enumerate(terms):
+            matches = self._postings.get(term, {})
+            if i == len(terms) - 1:
+                prefix_matches = self._prefix_matches(raw_last)
+                if prefix_matches:
+                    matches = {**prefix_matches, **matches}
+            if not matches:
+                return []
+            candidates.append(matches)
+
+        # Intersect starting from the shortest posting list
+        candidates.sort(key=len)
+        scores = dict(candidates[0])
+        for matches in candidates[1:]:
+            scores = {key: score + matches[key] for key, score in scores.items() if key in matches}
+            if not scores:
+                return []
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [key for key, _ in ranked[:limit]]
+
+
+# Fields loaded from Mongo when (re)building the index
+INDEX_PROJECTION = {field: 1 for field in FIELD_WEIGHTS}
+
+
+async def build_index(collection, index: SearchIndex, batch_size: int = 1000) -> int:
+    """Populate the index from the products collection.
+
+    The new postings are built on the side and swapped in at the end, so
+    searches keep being served from the old ones during a rebuild.
+    """
+    fresh = SearchIndex()
+    cursor = collection.find({}, INDEX_PROJECTION).batch_size(batch_size)
+    async for doc in cursor:
+        fresh.add(doc)
+    index.replace(fresh)
+    return len(index)
+
+
+class IndexRefresher:
+    """Runs index rebuilds in the background, one at a time.
+
+    A rebuild requested while one is running does not start a second,
+    overlapping one (whose older postings could be swapped in last); it
+    marks the running one to go again once it finishes, so the final
+    rebuild always starts after the latest request.
+    """
+
+    def __init__(self, rebuild: Callable[[], Awaitable]):
+        self._rebuild = rebuild
+        self._task: Optional[asyncio.Task] = None
+        self._again = False
+
+    def request(self) -> asyncio.Task:
+        """Schedule a rebuild; returns the task that will carry it out"""
+        if self._task is not None and not self._task.done():
+            self._again = True
+        else:
+            self._task = asyncio.create_task(self._run())
+        return self._task
+
+    async def _run(self):
+        while True:
+            self._again = False
+            await self._rebuild()
+            if not self._again:
+                return
+
+    def cancel(self):
+        if self._task is not None:
+            self._task.cancel()
@@ -0,0 +1,115 @@
+# Versioned seed migrations guarded by a single-writer lock
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, List, Tuple
+
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from facets import rebuild_facets
+from seed_data import categories_data, products_data
+
+logger = logging.getLogger(__name__)
+
+SEED_STATE_ID = "seed_state"
+SEED_LOCK_ID = "seed_lock"
+
+# A worker that dies mid-seed blocks others for at most this long
+SEED_LOCK_TTL = timedelta(minutes=5)
+
+
+async def seed_initial_catalog(db):
+    """Categories by id and products by (categoryId, name).
+
+    $setOnInsert leaves documents that already exist untouched, so this is
+    safe on databases seeded by the old insert-if-empty startup code.
+    """
+    await db.categories.bulk_write(
+        [UpdateOne({"id": c["id"]}, {"$setOnInsert": dict(c)}, upsert=True) for c in categories_data],
+        ordered=False,
+    )
+    await db.products.bulk_write(
+        [
+            UpdateOne({"categoryId": p["categoryId"], "name": p["name"]}, {"$setOnInsert": dict(p)}, upsert=True)
+            for p in products_data
+        ],
+        ordered=False,
+    )
+
+
+async def rebuild_facet_rollups(db):
+    """Rewrite rollups stored under bucket labels containing dots ("4-4.5")"""
+    await rebuild_facets(db.products, db.product_facets)
+
+
+# Applied in order, each exactly once per database. Append new versions;
+# never edit or reorder ones that have shipped.
+SEED_MIGRATIONS: List[Tuple[int, str, Callable[..., Awaitable]]] = [
+    (1, "initial categories and products", seed_initial_catalog),
+    (2, "facet rollups with dot-free bucket keys", rebuild_facet_rollups),
+]
+LATEST_SEED_VERSION = SEED_MIGRATIONS[-1][0]
+
+
+async def _acquire_lock(meta, owner: str) -> bool:
+    now = datetime.utcnow()
+    try:
+        # Matches only a free (expired) lock; a held one makes the upsert collide
+        await meta.update_one(
+            {"_id": SEED_LOCK_ID, "expiresAt": {"$lte": now}},
+            {"$set": {"owner": owner, "expiresAt": now + SEED_LOCK_TTL}},
+            upsert=True,
+        )
+        return True
+    except DuplicateKeyError:
+        return False
+
+
+async def _release_lock(meta, owner: str):
+    await meta.delete_one({"_id": SEED_LOCK_ID, "owner": owner})
+
+
+async def _seed_version(meta) -> int:
+    state = await meta.find_one({"_id": SEED_STATE_ID}, {"version": 1})
+    return state["version"] if state else 0
+
+
+async def run_seed_migrations(db) -> List[int]:
+    """Apply pending seed migrations; returns the versions applied here.
+
+    Up-to-date databases cost one find_one. Otherwise one worker takes the
+    lock and seeds while the others skip seeding and carry on starting up.
+    """
+    meta = db.meta
+    if await _seed_version(meta) >= LATEST_SEED_VERSION:
+        return []
+
+    owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    if not await _acquire_lock(meta, owner):
+        logger.info("Another worker is seeding the database")
+        return []
+
+    applied = []
+    try:
+        # Re-check under the lock: the previous holder may have finished
+        current = await _seed_version(meta)
+        for version, name, migrate in SEED_MIGRATIONS:
+            if version <= current:
+                continue
+            await migrate(db)
+            await meta.update_one(
+                {"_id": SEED_STATE_ID},
+                {
+                    "$set": {"version": version},
+                    "$push": {"applied": {"version": version, "name": name, "appliedAt": datetime.utcnow()}},
+                },
+                upsert=True,
+            )
+            applied.append(version)
+            logger.info(f"Applied seed migration {version}: {name}")
+    finally:
+        await _release_lock(meta, owner)
+    return applied
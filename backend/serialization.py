@@ -0,0 +1,81 @@
+# Fast response serialization for Mongo documents
+from typing import Iterable, List, Type
+
+import orjson
+from bson import ObjectId
+from pydantic import BaseModel
+from starlette.responses import Response
+
+from models import Product, ProductCard, Order, Category
+
+
+def _default(value):
+    # Safety net for documents that still carry an ObjectId somewhere
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError
+
+
+def dumps(content) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(Response):
+    """JSON response rendered with orjson.
+
+    Returning it from a route bypasses the response_model re-validation, so
+    handlers must shape documents themselves via the projections below.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def model_projection(model: Type[BaseModel], keep_id: bool = False) -> dict:
+    """Mongo projection limited to the fields of a response model"""
+    projection = {field: 1 for field in model.model_fields}
+    if not keep_id:
+        projection["_id"] = 0
+    return projection
+
+
+# Seeded products have no `id` field, so `_id` is kept to derive it
+PRODUCT_PROJECTION = model_projection(Product, keep_id=True)
+ORDER_PROJECTION = model_projection(Order)
+CATEGORY_PROJECTION = model_projection(Category)
+
+# Home page product cards; `id` falls back to `_id` inside the pipeline since
+# cards are nested under their category
+PRODUCT_CARD_PROJECTION = {
+    **model_projection(ProductCard),
+    "id": {"$ifNull": ["$id", {"$toString": "$_id"}]},
+}
+
+# Order history cards: computed in Mongo so item lists never leave the server
+ORDER_SUMMARY_PROJECTION = {
+    "_id": 0,
+    "id": 1,
+    "status": 1,
+    "totalAmount": 1,
+    "createdAt": 1,
+    "itemCount": {"$sum": "$items.quantity"},
+    "thumbnail": {"$arrayElemAt": ["$items.image", 0]},
+}
+
+
+def product_out(doc: dict) -> dict:
+    """Map `_id` to `id` on a projected product.
+
+    Product documents have no nested ObjectIds, so only the top level is
+    touched instead of walking the whole document.
+    """
+    _id = doc.pop("_id", None)
+    if "id" not in doc and _id is not None:
+        doc["id"] = str(_id)
+    return doc
+
+
+def products_out(docs: Iterable[dict]) -> List[dict]:
+    return [product_out(doc) for doc in docs]
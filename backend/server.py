@@ -1,29 +1,66 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Header, Query, Request, UploadFile, File, status
+from fastapi.responses import StreamingResponse, PlainTextResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import io
+import asyncio
 import logging
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Union
 from datetime import datetime
 from bson import ObjectId
+from pymongo import ReturnDocument
 
 from models import (
-    Product, ProductCreate, Category, 
+    Product, ProductCreate, ProductPage, ProductBatchRequest, ProductBatchResponse, Category, HomeSection,
     User, UserSignup, UserLogin, UserResponse,
-    Order, OrderCreate, OrderItem,
+    Order, OrderCreate, OrderItem, OrderSummary, OrderPage,
+    CartItem, CartItemUpdate, CartMerge, StockUpdate, ReservationCreate,
     PaymentOrderCreate, PaymentVerify
 )
-from auth import hash_password, verify_password, create_access_token, get_current_user
-from seed_data import categories_data, products_data
+from auth import (
+    hash_password_async, verify_password_async, create_access_token, get_current_user, hash_executor,
+    token_cache
+)
+from seeding import run_seed_migrations
+from search import IndexRefresher, SearchIndex, build_index
+from pagination import encode_cursor, decode_cursor
+from indexes import ensure_indexes
+from catalog_cache import CatalogCache
+from pricing import PRICING_PROJECTION, PricingError, price_order
+from facets import build_product_filter, get_facets, rebuild_facets
+from importer import detect_format, import_products, parse_rows
+from inventory import Inventory, OutOfStockError, ReservationError, reserved_quantities
+from cart import (
+    CART_PROJECTION, ensure_cart_op, ensure_item_op, increment_filter, increment_update,
+    merge_ops, visible_items
+)
+from compression import CompressionMiddleware
+from metrics import MetricsRegistry, MetricsMiddleware, PoolMetrics, cache_collector
+from mongo_monitor import CommandMonitor, current_route
+from serialization import (
+    dumps, FastJSONResponse, PRODUCT_PROJECTION, ORDER_PROJECTION, ORDER_SUMMARY_PROJECTION, CATEGORY_PROJECTION,
+    PRODUCT_CARD_PROJECTION,
+    product_out, products_out
+)
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# Request and Mongo pool metrics, exposed at /metrics
+metrics = MetricsRegistry()
+mongo_pool_metrics = PoolMetrics()
+metrics.register_collector(mongo_pool_metrics.collect)
+
+# Per-route Mongo command latency and the slow-query log
+command_monitor = CommandMonitor(slow_ms=float(os.environ.get("MONGO_SLOW_MS", "100")))
+metrics.register_collector(command_monitor.collect)
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, event_listeners=[mongo_pool_metrics, command_monitor])
 db = client[os.environ['DB_NAME']]
 
 # Collections
@@ -31,12 +68,41 @@ products_collection = db.products
 users_collection = db.users
 orders_collection = db.orders
 categories_collection = db.categories
+carts_collection = db.carts
+facets_collection = db.product_facets
+meta_collection = db.meta
+
+# In-process product search index, built at startup
+search_index = SearchIndex()
+
+# Rendered catalog responses, invalidated through the catalog version in Mongo
+catalog_cache = CatalogCache(
+    meta_collection,
+    ttl=float(os.environ.get("CATALOG_CACHE_TTL", "300")),
+    max_entries=int(os.environ.get("CATALOG_CACHE_SIZE", "1024")),
+    version_check_interval=float(os.environ.get("CATALOG_VERSION_CHECK_SECONDS", "1")),
+)
+metrics.register_collector(cache_collector("catalog_cache", catalog_cache.stats))
+metrics.register_collector(cache_collector("jwt_cache", token_cache.stats))
+
+# Stock counters and checkout reservations
+inventory = Inventory(
+    db.inventory,
+    db.reservations,
+    reservation_ttl=float(os.environ.get("RESERVATION_TTL_SECONDS", "900")),
+)
+INVENTORY_REAPER_INTERVAL = float(os.environ.get("INVENTORY_REAPER_INTERVAL", "30"))
 
 # Create the main app
 app = FastAPI(title="Flipkart Clone API")
 
+async def tag_route(request: Request):
+    """Label Mongo commands issued by this request with its route template"""
+    route = request.scope.get("route")
+    current_route.set(route.path if route is not None else request.url.path)
+
 # Create a router with the /api prefix
-api_router = APIRouter(prefix="/api")
+api_router = APIRouter(prefix="/api", dependencies=[Depends(tag_route)])
 
 # Configure logging
 logging.basicConfig(
@@ -46,57 +112,121 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # ============== HELPER FUNCTIONS ==============
-def convert_objectid_to_str(doc):
-    """Convert MongoDB ObjectId to string and handle id field"""
-    if doc is None:
-        return None
-    
-    if isinstance(doc, list):
-        return [convert_objectid_to_str(item) for item in doc]
-    
-    if isinstance(doc, dict):
-        # Convert _id to id if present and no id field exists
-        if "_id" in doc and "id" not in doc:
-            doc["id"] = str(doc["_id"])
-        
-        # Remove _id field
-        if "_id" in doc:
-            del doc["_id"]
-        
-        # Convert any other ObjectId fields
-        for key, value in doc.items():
-            if isinstance(value, ObjectId):
-                doc[key] = str(value)
-            elif isinstance(value, dict):
-                doc[key] = convert_objectid_to_str(value)
-            elif isinstance(value, list):
-                doc[key] = convert_objectid_to_str(value)
-    
-    return doc
+def to_object_id(value: str):
+    """Return an ObjectId for valid hex strings, otherwise the value unchanged"""
+    return ObjectId(value) if ObjectId.is_valid(value) else value
+
+async def refresh_search_index():
+    try:
+        indexed = await build_index(products_collection, search_index)
+        logger.info(f"Search index built with {indexed} products")
+    except Exception as e:
+        logger.error(f"Error building search index: {e}")
+
+# Search index rebuilds run in the background, never two at once
+search_refresher = IndexRefresher(refresh_search_index)
+
+async def refresh_catalog_after_bulk_write():
+    """Recompute everything derived from products after seeding"""
+    await rebuild_facets(products_collection, facets_collection)
+    await catalog_cache.bump_version()
+    await search_refresher.request()
+
+async def refresh_catalog_after_import():
+    """Publish an import without rescanning the catalog in the request.
+
+    Facet rollups were already adjusted chunk by chunk; the search index is
+    rebuilt in the background and keeps serving the old postings meanwhile.
+    """
+    await catalog_cache.bump_version()
+    search_refresher.request()
+
+# Another worker changed the catalog; rebuild our copy of the search index
+catalog_cache.on_version_change(lambda version: search_refresher.request())
+
+async def fetch_products_by_ids(ids: List[str], projection: dict = PRODUCT_PROJECTION) -> dict:
+    """Resolve product ids in a single query.
+
+    Products are addressed by their `id` field or, for seeded products, by
+    the hex string of their `_id`; both are matched in one `$or` of `$in`s.
+    Returns a dict from each requested id that was found to its document.
+    """
+    if not ids:
+        return {}
+    object_ids = [ObjectId(value) for value in ids if ObjectId.is_valid(value)]
+    query = {"id": {"$in": ids}}
+    if object_ids:
+        query = {"$or": [query, {"_id": {"$in": object_ids}}]}
+    products = await products_collection.find(query, projection).to_list(len(ids) * 2)
+
+    requested = set(ids)
+    found = {}
+    for product in products:
+        for key in (product.get("id"), str(product.get("_id"))):
+            if key in requested:
+                found[key] = product
+    return found
 
 # ============== INITIALIZATION ==============
 @app.on_event("startup")
 async def startup_db():
-    """Initialize database with seed data if empty"""
+    """Create indexes and apply pending seed migrations"""
     try:
-        # Seed categories
-        if await categories_collection.count_documents({}) == 0:
-            await categories_collection.insert_many(categories_data)
-            logger.info("Categories seeded successfully")
-        
-        # Seed products
-        if await products_collection.count_documents({}) == 0:
-            await products_collection.insert_many(products_data)
-            logger.info("Products seeded successfully")
-            
+        await ensure_indexes(db)
+    except Exception as e:
+        logger.error(f"Error ensuring indexes: {e}")
+
+    try:
+        applied = await run_seed_migrations(db)
+        if applied:
+            await refresh_catalog_after_bulk_write()
+            return
+        if await facets_collection.estimated_document_count() == 0:
+            await rebuild_facets(products_collection, facets_collection)
+            logger.info("Product facet rollups rebuilt")
     except Exception as e:
         logger.error(f"Error seeding database: {e}")
 
+    await search_refresher.request()
+
+async def release_expired_reservations():
+    """Background loop returning stock from reservations that were never paid"""
+    while True:
+        await asyncio.sleep(INVENTORY_REAPER_INTERVAL)
+        try:
+            await inventory.release_expired()
+        except Exception as e:
+            logger.error(f"Error releasing expired reservations: {e}")
+
+@app.on_event("startup")
+async def start_inventory_reaper():
+    app.state.inventory_reaper = asyncio.create_task(release_expired_reservations())
+
+@app.on_event("startup")
+async def start_command_monitor():
+    app.state.slow_query_explainer = command_monitor.attach(asyncio.get_running_loop(), db)
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    app.state.inventory_reaper.cancel()
+    app.state.slow_query_explainer.cancel()
+    search_refresher.cancel()
     client.close()
+    hash_executor.shutdown(wait=False)
+
+async def get_current_admin(user_id: str = Depends(get_current_user)) -> str:
+    """Dependency for admin-only routes"""
+    user = await users_collection.find_one({"id": user_id}, {"role": 1})
+    if not user or user.get("role") != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return user_id
 
 # ============== ROOT & HEALTH ==============
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus text exposition"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @api_router.get("/")
 async def root():
     return {"message": "Flipkart Clone API", "status": "running"}
@@ -107,61 +237,235 @@ async def health():
 
 # ============== CATEGORIES API ==============
 @api_router.get("/categories", response_model=List[Category])
-async def get_categories():
+async def get_categories(
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None)
+):
     """Get all categories"""
-    categories = await categories_collection.find().to_list(100)
-    return convert_objectid_to_str(categories)
+    async def load():
+        return await categories_collection.find({}, CATEGORY_PROJECTION).to_list(100)
+
+    entry = await catalog_cache.get_or_load("categories", load)
+    return entry.to_response(if_none_match, accept_encoding)
+
+# ============== HOME API ==============
+# Sort keys for the home page rows; each is served by a (categoryId, key) index
+HOME_SORTS = {"rating": {"rating": -1}, "discount": {"discount": -1}}
+MAX_HOME_PRODUCTS = 24
+
+@api_router.get("/home", response_model=List[HomeSection])
+async def get_home(
+    sort: str = "rating",
+    limit: int = 8,
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None)
+):
+    """Categories with their top products, in one aggregation.
+
+    ``sort`` is a comma-separated list of row keys (e.g. ``rating,discount``);
+    each category's ``products`` maps every key to its top ``limit`` cards.
+    """
+    sorts = list(dict.fromkeys(key.strip() for key in sort.split(",") if key.strip()))
+    if not sorts or any(key not in HOME_SORTS for key in sorts):
+        raise HTTPException(status_code=400, detail=f"sort must be a list of: {', '.join(HOME_SORTS)}")
+    if not 0 < limit <= MAX_HOME_PRODUCTS:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_HOME_PRODUCTS}")
+
+    async def load():
+        pipeline = [{"$sort": {"id": 1}}]
+        for key in sorts:
+            pipeline.append({"$lookup": {
+                "from": products_collection.name,
+                "localField": "id",
+                "foreignField": "categoryId",
+                "pipeline": [
+                    {"$sort": HOME_SORTS[key]},
+                    {"$limit": limit},
+                    {"$project": PRODUCT_CARD_PROJECTION},
+                ],
+                "as": f"top_{key}",
+            }})
+        pipeline.append({"$project": {
+            **CATEGORY_PROJECTION,
+            "products": {key: f"$top_{key}" for key in sorts},
+        }})
+        return await categories_collection.aggregate(pipeline).to_list(None)
+
+    entry = await catalog_cache.get_or_load(f"home:{','.join(sorts)}:{limit}", load)
+    return entry.to_response(if_none_match, accept_encoding)
 
 # ============== PRODUCTS API ==============
-@api_router.get("/products", response_model=List[Product])
+@api_router.get("/products", response_model=Union[List[Product], ProductPage])
 async def get_products(
     category: Optional[int] = None,
     limit: int = 100,
-    skip: int = 0
+    skip: int = 0,
+    cursor: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    min_rating: Optional[float] = None,
+    min_discount: Optional[int] = None,
+    fast_delivery: Optional[bool] = None,
+    in_stock: Optional[bool] = None,
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None)
 ):
-    """Get all products with optional category filter"""
-    query = {}
-    if category:
-        query["categoryId"] = category
+    """Get all products with optional category and attribute filters.
+
+    Passing ``cursor`` (empty for the first page) switches to keyset
+    pagination on (categoryId, _id) and returns ``{items, next_cursor,
+    facets}``, where facets are the precomputed bucket counts for the
+    category; otherwise skip/limit paging returns a plain list.
+    """
+    query = build_product_filter(
+        category, min_price, max_price, min_rating, min_discount, fast_delivery, in_stock
+    )
+    filter_key = f"{min_price}:{max_price}:{min_rating}:{min_discount}:{fast_delivery}:{in_stock}"
     
-    products = await products_collection.find(query).skip(skip).limit(limit).to_list(limit)
-    return convert_objectid_to_str(products)
+    if cursor is None:
+        async def load():
+            products = await products_collection.find(query, PRODUCT_PROJECTION).skip(skip).limit(limit).to_list(limit)
+            return products_out(products)
+
+        key = f"products:{category}:{filter_key}:{skip}:{limit}"
+    else:
+        if limit <= 0 or limit > 100:
+            raise HTTPException(status_code=400, detail="limit must be between 1 and 100")
+
+        async def load():
+            page = await load_products_page(query, category, limit, cursor)
+            page["facets"] = await get_facets(facets_collection, category)
+            return page
+
+        key = f"products:{category}:{filter_key}:cursor:{cursor}:{limit}"
+
+    entry = await catalog_cache.get_or_load(key, load)
+    return entry.to_response(if_none_match, accept_encoding)
+
+async def load_products_page(query: dict, category: Optional[int], limit: int, cursor: str):
+    """Keyset page over (categoryId, _id); cost does not grow with depth"""
+    if cursor:
+        position = decode_cursor(cursor)
+        try:
+            last_category = position["c"]
+            last_id = to_object_id(position["i"])
+        except KeyError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if category:
+            query["_id"] = {"$gt": last_id}
+        else:
+            query["$or"] = [
+                {"categoryId": {"$gt": last_category}},
+                {"categoryId": last_category, "_id": {"$gt": last_id}},
+            ]
+
+    # Fetch one extra document to learn whether another page exists
+    products = await products_collection.find(query, PRODUCT_PROJECTION).sort(
+        [("categoryId", 1), ("_id", 1)]
+    ).limit(limit + 1).to_list(limit + 1)
+
+    next_cursor = None
+    if len(products) > limit:
+        products = products[:limit]
+        last = products[-1]
+        next_cursor = encode_cursor({"c": last.get("categoryId"), "i": str(last["_id"])})
+
+    return {"items": products_out(products), "next_cursor": next_cursor}
+
+@api_router.get("/products/facets")
+async def get_product_facets(
+    category: Optional[int] = None,
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None)
+):
+    """Precomputed facet counts for a category or the whole catalog"""
+    async def load():
+        return await get_facets(facets_collection, category)
+
+    entry = await catalog_cache.get_or_load(f"facets:{category}", load)
+    return entry.to_response(if_none_match, accept_encoding)
 
 @api_router.get("/products/search")
 async def search_products(q: str):
     """Search products by name, category, or description"""
-    query = {
-        "$or": [
-            {"name": {"$regex": q, "$options": "i"}},
-            {"category": {"$regex": q, "$options": "i"}},
-            {"description": {"$regex": q, "$options": "i"}}
-        ]
-    }
-    products = await products_collection.find(query).to_list(100)
-    return convert_objectid_to_str(products)
+    keys = search_index.search(q, limit=100)
+    if not keys:
+        if q.strip():
+            return []
+        # An empty query matches everything, as the regex search did
+        products = await products_collection.find({}, PRODUCT_PROJECTION).to_list(100)
+        return FastJSONResponse(products_out(products))
+
+    products = await products_collection.find(
+        {"_id": {"$in": [to_object_id(key) for key in keys]}}, PRODUCT_PROJECTION
+    ).to_list(len(keys))
+
+    # Restore relevance order; skip hits removed since they were indexed
+    by_key = {SearchIndex.doc_key(product): product for product in products}
+    ranked = [by_key[key] for key in keys if key in by_key]
+    return FastJSONResponse(products_out(ranked))
+
+MAX_BATCH_IDS = 300
+
+async def get_products_batch(ids: List[str]):
+    # Drop duplicates but keep the order the client asked for
+    ids = list(dict.fromkeys(value for value in ids if value))
+    if len(ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} ids per batch")
+
+    found = await fetch_products_by_ids(ids)
+    products = [dict(found[value]) for value in ids if value in found]
+    missing = [value for value in ids if value not in found]
+    return FastJSONResponse({"products": products_out(products), "missing": missing})
+
+@api_router.get("/products/batch", response_model=ProductBatchResponse)
+async def get_products_batch_query(ids: str):
+    """Get several products by comma-separated ids, in request order"""
+    return await get_products_batch(ids.split(","))
+
+@api_router.post("/products/batch", response_model=ProductBatchResponse)
+async def get_products_batch_body(batch: ProductBatchRequest):
+    """Get several products by id, in request order"""
+    return await get_products_batch(batch.ids)
 
 @api_router.get("/products/category/{category_id}")
-async def get_products_by_category(category_id: int):
+async def get_products_by_category(
+    category_id: int,
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None)
+):
     """Get products by category ID"""
-    products = await products_collection.find({"categoryId": category_id}).to_list(100)
-    return convert_objectid_to_str(products)
+    async def load():
+        products = await products_collection.find({"categoryId": category_id}, PRODUCT_PROJECTION).to_list(100)
+        return products_out(products)
+
+    entry = await catalog_cache.get_or_load(f"category:{category_id}", load)
+    return entry.to_response(if_none_match, accept_encoding)
 
 @api_router.get("/products/{product_id}")
-async def get_product(product_id: str):
+async def get_product(
+    product_id: str,
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None)
+):
     """Get single product by ID"""
+    entry = await catalog_cache.get_or_load(f"product:{product_id}", lambda: load_product(product_id))
+    return entry.to_response(if_none_match, accept_encoding)
+
+async def load_product(product_id: str):
     # Try to find by id field first, then by _id
-    product = await products_collection.find_one({"id": product_id})
+    product = await products_collection.find_one({"id": product_id}, PRODUCT_PROJECTION)
     if not product:
         # Try finding by _id if it's a valid ObjectId
         try:
-            product = await products_collection.find_one({"_id": ObjectId(product_id)})
+            product = await products_collection.find_one({"_id": ObjectId(product_id)}, PRODUCT_PROJECTION)
         except:
             pass
     
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     
-    return convert_objectid_to_str(product)
+    return product_out(product)
 
 # ============== AUTH API ==============
 @api_router.post("/auth/signup", response_model=UserResponse)
@@ -177,7 +481,7 @@ async def signup(user_data: UserSignup):
         name=user_data.name,
         email=user_data.email,
         phone=user_data.phone,
-        password=hash_password(user_data.password)
+        password=await hash_password_async(user_data.password)
     )
     
     await users_collection.insert_one(user.dict())
@@ -194,11 +498,22 @@ async def signup(user_data: UserSignup):
 async def login(credentials: UserLogin):
     """User login"""
     user = await users_collection.find_one({"email": credentials.email})
-    if not user or not verify_password(credentials.password, user["password"]):
+    if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
         )
+
+    valid, new_hash = await verify_password_async(credentials.password, user["password"])
+    if not valid:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect email or password"
+        )
+
+    # Stored hash used a different bcrypt cost; upgrade it transparently
+    if new_hash:
+        await users_collection.update_one({"id": user["id"]}, {"$set": {"password": new_hash}})
     
     access_token = create_access_token(data={"sub": user["id"]})
     
@@ -229,120 +544,444 @@ async def get_current_user_info(user_id: str = Depends(get_current_user)):
         role=user["role"]
     )
 
+# ============== CART API ==============
+async def cart_response(cart: Optional[dict]):
+    """Cart lines hydrated with current product data from one batched lookup"""
+    items = visible_items(cart)
+    found = await fetch_products_by_ids([item["productId"] for item in items])
+    lines = []
+    missing = []
+    for item in items:
+        product = found.get(item["productId"])
+        if product is None:
+            missing.append(item["productId"])
+            continue
+        lines.append({
+            "productId": item["productId"],
+            "quantity": item["quantity"],
+            "product": product_out(dict(product)),
+        })
+    return FastJSONResponse({"items": lines, "missing": missing})
+
+@api_router.get("/cart")
+async def get_cart(user_id: str = Depends(get_current_user)):
+    """Get current user's cart"""
+    cart = await carts_collection.find_one({"userId": user_id}, CART_PROJECTION)
+    return await cart_response(cart)
+
+@api_router.post("/cart")
+async def add_to_cart(item: CartItem, user_id: str = Depends(get_current_user)):
+    """Add quantity of a product to the cart"""
+    if item.quantity <= 0:
+        raise HTTPException(status_code=400, detail="Quantity must be positive")
+
+    now = datetime.utcnow()
+    await carts_collection.bulk_write(
+        [ensure_cart_op(user_id, now), ensure_item_op(user_id, item.productId, now)],
+        ordered=True
+    )
+    cart = await carts_collection.find_one_and_update(
+        increment_filter(user_id, item.productId),
+        increment_update(item.quantity),
+        projection=CART_PROJECTION,
+        return_document=ReturnDocument.AFTER
+    )
+    return {"items": visible_items(cart)}
+
+@api_router.put("/cart/{product_id}")
+async def update_cart_item(product_id: str, update: CartItemUpdate, user_id: str = Depends(get_current_user)):
+    """Set the quantity of a cart line; zero or less removes it"""
+    if update.quantity <= 0:
+        return await remove_from_cart(product_id, user_id)
+
+    now = datetime.utcnow()
+    await carts_collection.bulk_write(
+        [ensure_cart_op(user_id, now), ensure_item_op(user_id, product_id, now)],
+        ordered=True
+    )
+    cart = await carts_collection.find_one_and_update(
+        increment_filter(user_id, product_id),
+        {"$set": {"items.$.quantity": update.quantity}},
+        projection=CART_PROJECTION,
+        return_document=ReturnDocument.AFTER
+    )
+    return {"items": visible_items(cart)}
+
+@api_router.delete("/cart/{product_id}")
+async def remove_from_cart(product_id: str, user_id: str = Depends(get_current_user)):
+    """Remove a product from the cart"""
+    cart = await carts_collection.find_one_and_update(
+        {"userId": user_id},
+        {"$pull": {"items": {"productId": product_id}}, "$set": {"updatedAt": datetime.utcnow()}},
+        projection=CART_PROJECTION,
+        return_document=ReturnDocument.AFTER
+    )
+    return {"items": visible_items(cart)}
+
+@api_router.delete("/cart")
+async def clear_cart(user_id: str = Depends(get_current_user)):
+    """Empty the cart, e.g. after checkout"""
+    await carts_collection.update_one(
+        {"userId": user_id},
+        {"$set": {"items": [], "updatedAt": datetime.utcnow()}}
+    )
+    return {"items": []}
+
+@api_router.post("/cart/merge")
+async def merge_cart(merge: CartMerge, user_id: str = Depends(get_current_user)):
+    """Add an anonymous (localStorage) cart to the user's cart in one bulk write"""
+    quantities = {}
+    for item in merge.items:
+        if item.quantity > 0:
+            quantities[item.productId] = quantities.get(item.productId, 0) + item.quantity
+    if len(quantities) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} products per merge")
+
+    if quantities:
+        await carts_collection.bulk_write(merge_ops(user_id, quantities, datetime.utcnow()), ordered=True)
+    cart = await carts_collection.find_one({"userId": user_id}, CART_PROJECTION)
+    return await cart_response(cart)
+
+# ============== INVENTORY API ==============
+@api_router.post("/checkout/reserve")
+async def reserve_stock(reservation_data: ReservationCreate, user_id: str = Depends(get_current_user)):
+    """Hold stock for the cart while the user pays"""
+    quantities = {}
+    for item in reservation_data.items:
+        if item.quantity <= 0:
+            raise HTTPException(status_code=400, detail="Quantity must be positive")
+        quantities[item.productId] = quantities.get(item.productId, 0) + item.quantity
+    if len(quantities) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} products per reservation")
+
+    try:
+        reservation = await inventory.reserve(user_id, list(quantities.items()))
+    except OutOfStockError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"reservationId": reservation["id"], "expiresAt": reservation["expiresAt"]}
+
+@api_router.delete("/checkout/reserve/{reservation_id}")
+async def release_stock(reservation_id: str, user_id: str = Depends(get_current_user)):
+    """Give up a stock hold, e.g. when payment is cancelled"""
+    released = await inventory.release(reservation_id, user_id)
+    return {"released": released}
+
+@api_router.get("/inventory/{product_id}")
+async def get_stock(product_id: str):
+    """Units available for a product; null when stock is not tracked"""
+    return {"productId": product_id, "available": await inventory.available(product_id)}
+
+@api_router.put("/admin/inventory/{product_id}")
+async def set_stock(product_id: str, update: StockUpdate, admin_id: str = Depends(get_current_admin)):
+    """Set a product's units on hand, optionally sharded for hot products.
+
+    Units in open reservations count as on hand, so ``available`` is what
+    is left after subtracting them.
+    """
+    if update.quantity < 0 or update.shards < 1:
+        raise HTTPException(status_code=400, detail="quantity must be >= 0 and shards >= 1")
+    await inventory.set_stock(product_id, update.quantity, update.shards)
+    return {
+        "productId": product_id,
+        "quantity": update.quantity,
+        "available": await inventory.available(product_id),
+        "shards": update.shards,
+    }
+
 # ============== ORDERS API ==============
 @api_router.post("/orders", response_model=Order)
 async def create_order(order_data: OrderCreate, user_id: str = Depends(get_current_user)):
-    """Create new order"""
+    """Create new order, repriced from the current catalog"""
+    if not order_data.items:
+        raise HTTPException(status_code=400, detail="Order must contain at least one item")
+    if len(order_data.items) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} items per order")
+
+    # One projected $in for every line, however large the cart
+    products = await fetch_products_by_ids(
+        list({item.productId for item in order_data.items}), PRICING_PROJECTION
+    )
+    try:
+        items, total = price_order(order_data.items, products)
+    except PricingError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    if order_data.totalAmount is not None and abs(order_data.totalAmount - total) > 0.01:
+        logger.info(f"Order total repriced from {order_data.totalAmount} to {total} for user {user_id}")
+
     order = Order(
         userId=user_id,
-        items=order_data.items,
-        totalAmount=order_data.totalAmount,
+        items=items,
+        totalAmount=total,
         shippingAddress=order_data.shippingAddress,
         paymentMethod=order_data.paymentMethod,
         paymentId=order_data.paymentId
     )
-    
+
+    quantities = {}
+    for item in items:
+        quantities[item.productId] = quantities.get(item.productId, 0) + item.quantity
+
+    if order_data.reservationId:
+        # Stock was held before payment; it must cover every line
+        reservation = await inventory.get(order_data.reservationId, user_id)
+        held = reserved_quantities(reservation) if reservation else {}
+        if any(held.get(product_id, 0) < quantity for product_id, quantity in quantities.items()):
+            raise HTTPException(status_code=409, detail="Reservation does not cover the order items")
+        reservation_id = order_data.reservationId
+    else:
+        try:
+            reservation = await inventory.reserve(user_id, list(quantities.items()))
+        except OutOfStockError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        reservation_id = reservation["id"]
+
+    try:
+        await inventory.commit(reservation_id, user_id, order.id)
+    except ReservationError as e:
+        raise HTTPException(status_code=410, detail=str(e))
+
     await orders_collection.insert_one(order.dict())
     return order
 
-@api_router.get("/orders", response_model=List[Order])
-async def get_user_orders(user_id: str = Depends(get_current_user)):
-    """Get all orders for current user"""
-    orders = await orders_collection.find({"userId": user_id}).sort("createdAt", -1).to_list(100)
-    return convert_objectid_to_str(orders)
+@api_router.get("/orders", response_model=Union[List[Order], List[OrderSummary], OrderPage])
+async def get_user_orders(
+    user_id: str = Depends(get_current_user),
+    view: str = "full",
+    cursor: Optional[str] = None,
+    limit: int = 20
+):
+    """Get orders for current user, newest first.
+
+    ``view=summary`` returns order cards (id, status, total, item count,
+    first thumbnail) instead of full orders. Passing ``cursor`` (empty for
+    the first page) pages on (createdAt, _id) and returns
+    ``{items, next_cursor}``; without it up to 100 orders are listed.
+    """
+    if view not in ("full", "summary"):
+        raise HTTPException(status_code=400, detail="view must be 'full' or 'summary'")
+    projection = ORDER_SUMMARY_PROJECTION if view == "summary" else ORDER_PROJECTION
+
+    query = {"userId": user_id}
+    if cursor is None:
+        limit = 100
+    else:
+        if limit <= 0 or limit > 100:
+            raise HTTPException(status_code=400, detail="limit must be between 1 and 100")
+        if cursor:
+            position = decode_cursor(cursor)
+            try:
+                last_created = datetime.fromisoformat(position["t"])
+                last_id = to_object_id(position["i"])
+            except (KeyError, TypeError, ValueError):
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            query["$or"] = [
+                {"createdAt": {"$lt": last_created}},
+                {"createdAt": last_created, "_id": {"$lt": last_id}},
+            ]
+
+    # _id is carried through only to build the next cursor
+    pipeline = [
+        {"$match": query},
+        {"$sort": {"createdAt": -1, "_id": -1}},
+        {"$limit": limit + 1},
+        {"$project": {**projection, "_id": 1}},
+    ]
+    orders = await orders_collection.aggregate(pipeline).to_list(limit + 1)
+
+    next_cursor = None
+    if len(orders) > limit:
+        orders = orders[:limit]
+        last = orders[-1]
+        next_cursor = encode_cursor({"t": last["createdAt"].isoformat(), "i": str(last["_id"])})
+    for order in orders:
+        del order["_id"]
+
+    if cursor is None:
+        return FastJSONResponse(orders)
+    return FastJSONResponse({"items": orders, "next_cursor": next_cursor})
 
 @api_router.get("/orders/{order_id}", response_model=Order)
 async def get_order(order_id: str, user_id: str = Depends(get_current_user)):
     """Get single order details"""
-    order = await orders_collection.find_one({"id": order_id, "userId": user_id})
+    order = await orders_collection.find_one({"id": order_id, "userId": user_id}, ORDER_PROJECTION)
     if not order:
         # Try finding by _id if it's a valid ObjectId
         try:
-            order = await orders_collection.find_one({"_id": ObjectId(order_id), "userId": user_id})
+            order = await orders_collection.find_one({"_id": ObjectId(order_id), "userId": user_id}, ORDER_PROJECTION)
         except:
             pass
     
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     
-    return convert_objectid_to_str(order)
+    return FastJSONResponse(order)
+
+# ============== DIAGNOSTICS API (Admin) ==============
+@api_router.get("/admin/slow-queries")
+async def get_slow_queries(admin_id: str = Depends(get_current_admin)):
+    """Most recent slow Mongo commands with their explained plans"""
+    return FastJSONResponse(list(command_monitor.recent_slow))
+
+# ============== EXPORT API (Admin) ==============
+EXPORT_COLLECTIONS = {
+    "products": products_collection,
+    "orders": orders_collection,
+}
+
+async def export_lines(collection, after: Optional[str], batch_size: int):
+    """Yield NDJSON in chunks of batch_size documents, in _id order.
+
+    Only one batch is held in memory at a time, however large the
+    collection is.
+    """
+    query = {"_id": {"$gt": ObjectId(after)}} if after else {}
+    cursor = collection.find(query).sort("_id", 1).batch_size(batch_size)
+    chunk = []
+    async for doc in cursor:
+        chunk.append(dumps(doc))
+        if len(chunk) >= batch_size:
+            yield b"\n".join(chunk) + b"\n"
+            chunk = []
+    if chunk:
+        yield b"\n".join(chunk) + b"\n"
+
+@api_router.get("/admin/export/{collection_name}")
+async def export_collection(
+    collection_name: str,
+    after: Optional[str] = None,
+    batch_size: int = 1000,
+    admin_id: str = Depends(get_current_admin)
+):
+    """Stream a whole collection as newline-delimited JSON.
+
+    Every line carries its ``_id``; to resume an interrupted export, pass
+    the ``_id`` of the last line received as ``after``.
+    """
+    collection = EXPORT_COLLECTIONS.get(collection_name)
+    if collection is None:
+        raise HTTPException(status_code=404, detail=f"Unknown export: {collection_name}")
+    if batch_size <= 0 or batch_size > 10000:
+        raise HTTPException(status_code=400, detail="batch_size must be between 1 and 10000")
+    if after and not ObjectId.is_valid(after):
+        raise HTTPException(status_code=400, detail="Invalid resume token")
+
+    return StreamingResponse(
+        export_lines(collection, after, batch_size),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{collection_name}.ndjson"'}
+    )
+
+# ============== IMPORT API (Admin) ==============
+@api_router.post("/admin/products/import")
+async def import_products_file(
+    file: UploadFile = File(...),
+    file_format: Optional[str] = Query(None, alias="format"),
+    chunk_size: int = 1000,
+    admin_id: str = Depends(get_current_admin)
+):
+    """Bulk upsert products from an NDJSON or CSV upload.
+
+    Rows are validated against ProductCreate in chunks and upserted by
+    stable product id; invalid rows are reported without aborting. Facet
+    counts are adjusted per chunk rather than recomputed for the catalog.
+    """
+    try:
+        fmt = detect_format(file.filename or "", file_format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if chunk_size <= 0 or chunk_size > 10000:
+        raise HTTPException(status_code=400, detail="chunk_size must be between 1 and 10000")
+
+    errors = []
+    lines = io.TextIOWrapper(file.file, encoding="utf-8", newline="")
+    try:
+        report = await import_products(
+            products_collection, parse_rows(lines, fmt, errors), errors, chunk_size,
+            facets_collection=facets_collection,
+        )
+    except UnicodeDecodeError:
+        # Chunks before the bad byte were already written
+        await refresh_catalog_after_import()
+        raise HTTPException(status_code=400, detail="Import file must be UTF-8")
+
+    if report["upserted"] or report["modified"]:
+        await refresh_catalog_after_import()
+    return report
 
 # ============== PAYMENT API (Razorpay Integration) ==============
-import razorpay
-import hmac
-import hashlib
+import uuid
+from payments import RazorpayGateway, PaymentGatewayError
 
-# Initialize Razorpay client
+# Initialize Razorpay gateway
 razorpay_key_id = os.getenv("RAZORPAY_KEY_ID")
 razorpay_key_secret = os.getenv("RAZORPAY_KEY_SECRET")
 
 if razorpay_key_id and razorpay_key_secret:
-    razorpay_client = razorpay.Client(auth=(razorpay_key_id, razorpay_key_secret))
-    logger.info("Razorpay client initialized successfully")
+    payment_gateway = RazorpayGateway(
+        razorpay_key_id,
+        razorpay_key_secret,
+        base_url=os.getenv("RAZORPAY_BASE_URL", "https://api.razorpay.com/v1"),
+        timeout=float(os.getenv("RAZORPAY_TIMEOUT", "10")),
+        max_retries=int(os.getenv("RAZORPAY_MAX_RETRIES", "2")),
+    )
+    logger.info("Razorpay gateway initialized successfully")
 else:
-    razorpay_client = None
+    payment_gateway = None
     logger.warning("Razorpay credentials not found, payment will be in mock mode")
 
+@app.on_event("shutdown")
+async def shutdown_payment_gateway():
+    if payment_gateway:
+        await payment_gateway.aclose()
+
 @api_router.post("/payment/create-order")
 async def create_payment_order(payment_data: PaymentOrderCreate):
     """Create Razorpay order"""
-    try:
-        if not razorpay_client:
-            # Fallback to mock if credentials not available
-            import uuid
-            return {
-                "orderId": f"order_{uuid.uuid4().hex[:12]}",
-                "amount": int(payment_data.amount * 100),
-                "currency": "INR",
-                "key": razorpay_key_id or "mock_key"
-            }
-        
-        # Create Razorpay order
-        order_data = {
-            "amount": int(payment_data.amount * 100),  # Convert to paise
-            "currency": "INR",
-            "payment_capture": 1  # Auto capture
-        }
-        
-        order = razorpay_client.order.create(data=order_data)
-        
+    if not payment_gateway:
+        # Fallback to mock if credentials not available
         return {
-            "orderId": order["id"],
-            "amount": order["amount"],
-            "currency": order["currency"],
-            "key": razorpay_key_id
+            "orderId": f"order_{uuid.uuid4().hex[:12]}",
+            "amount": int(payment_data.amount * 100),
+            "currency": "INR",
+            "key": razorpay_key_id or "mock_key"
         }
-    except Exception as e:
+
+    try:
+        # Amount is sent in paise
+        order = await payment_gateway.create_order(int(payment_data.amount * 100), currency="INR")
+    except PaymentGatewayError as e:
         logger.error(f"Error creating Razorpay order: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to create payment order: {str(e)}")
+        raise HTTPException(status_code=502, detail=f"Failed to create payment order: {str(e)}")
+
+    return {
+        "orderId": order["id"],
+        "amount": order["amount"],
+        "currency": order["currency"],
+        "key": razorpay_key_id
+    }
 
 @api_router.post("/payment/verify")
 async def verify_payment(payment_data: PaymentVerify):
     """Verify Razorpay payment signature"""
-    try:
-        if not razorpay_client:
-            # Mock verification
-            return {"status": "success", "message": "Payment verified (mock mode)"}
-        
-        # Verify signature
-        params_dict = {
-            'razorpay_order_id': payment_data.razorpay_order_id,
-            'razorpay_payment_id': payment_data.razorpay_payment_id,
-            'razorpay_signature': payment_data.razorpay_signature
-        }
-        
-        razorpay_client.utility.verify_payment_signature(params_dict)
-        
-        return {
-            "status": "success",
-            "message": "Payment verified successfully",
-            "payment_id": payment_data.razorpay_payment_id
-        }
-    except razorpay.errors.SignatureVerificationError:
+    if not payment_gateway:
+        # Mock verification
+        return {"status": "success", "message": "Payment verified (mock mode)"}
+
+    # Signature check is a local HMAC, no Razorpay round trip
+    valid = payment_gateway.verify_payment_signature(
+        payment_data.razorpay_order_id,
+        payment_data.razorpay_payment_id,
+        payment_data.razorpay_signature
+    )
+    if not valid:
         raise HTTPException(status_code=400, detail="Invalid payment signature")
-    except Exception as e:
-        logger.error(f"Error verifying payment: {e}")
-        raise HTTPException(status_code=500, detail=f"Payment verification failed: {str(e)}")
+
+    return {
+        "status": "success",
+        "message": "Payment verified successfully",
+        "payment_id": payment_data.razorpay_payment_id
+    }
 
 # Include the router in the main app
 app.include_router(api_router)
@@ -354,4 +993,10 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
-)
\ No newline at end of file
+)
+
+# Catalog cache entries arrive already compressed and pass through this
+app.add_middleware(CompressionMiddleware)
+
+# Outermost, so the latency covers every other middleware
+app.add_middleware(MetricsMiddleware, registry=metrics)
\ No newline at end of file
@@ -44,6 +44,7 @@ export const AuthProvider = ({ children }) => {
       
       localStorage.setItem('token', access_token);
       localStorage.setItem('user', JSON.stringify(userData));
+      // CartContext merges the anonymous cart once the user is set
       setUser(userData);
       
       return userData;
@@ -1,4 +1,6 @@
-import React, { createContext, useContext, useState, useEffect } from 'react';
+import React, { createContext, useContext, useState, useEffect, useCallback } from 'react';
+import { useAuth } from './AuthContext';
+import { cartAPI } from '../services/api';
 
 const CartContext = createContext();
 
@@ -10,22 +12,69 @@ export const useCart = () => {
   return context;
 };
 
+// Server cart lines carry the product; the UI works with flat product + quantity items
+const fromServer = (response) =>
+  response.data.items
+    .filter(line => line.product)
+    .map(line => ({ ...line.product, quantity: line.quantity }));
+
 export const CartProvider = ({ children }) => {
+  const { user, loading } = useAuth();
   const [cart, setCart] = useState([]);
   const [wishlist, setWishlist] = useState([]);
 
-  // Load cart from localStorage on mount
   useEffect(() => {
-    const savedCart = localStorage.getItem('cart');
     const savedWishlist = localStorage.getItem('wishlist');
-    if (savedCart) setCart(JSON.parse(savedCart));
     if (savedWishlist) setWishlist(JSON.parse(savedWishlist));
   }, []);
 
-  // Save cart to localStorage whenever it changes
+  const refreshCart = useCallback(() => {
+    return cartAPI.get()
+      .then(response => setCart(fromServer(response)))
+      .catch(error => console.error('Error loading cart:', error));
+  }, []);
+
+  // Anonymous users keep the cart in localStorage. On login it is merged into
+  // the server cart once and then cleared, so a later login cannot add it again.
   useEffect(() => {
-    localStorage.setItem('cart', JSON.stringify(cart));
-  }, [cart]);
+    if (loading) return;
+    if (!user) {
+      const savedCart = localStorage.getItem('cart');
+      setCart(savedCart ? JSON.parse(savedCart) : []);
+      return;
+    }
+    const savedCart = JSON.parse(localStorage.getItem('cart') || '[]');
+    if (savedCart.length === 0) {
+      refreshCart();
+      return;
+    }
+    cartAPI.merge(savedCart.map(item => ({ productId: item.id, quantity: item.quantity })))
+      .then(response => {
+        localStorage.removeItem('cart');
+        setCart(fromServer(response));
+      })
+      .catch(error => {
+        console.error('Error merging cart:', error);
+        refreshCart();
+      });
+  }, [user, loading, refreshCart]);
+
+  // Only the anonymous cart lives in localStorage
+  useEffect(() => {
+    if (!loading && !user) {
+      localStorage.setItem('cart', JSON.stringify(cart));
+    }
+  }, [cart, user, loading]);
+
+  // Server writes follow the optimistic local update; on failure reload the server copy
+  const syncServer = (request) => {
+    if (user) {
+      request().catch(error => {
+        console.error('Error updating cart:', error);
+        refreshCart();
+      });
+    }
+  };
 
   useEffect(() => {
     localStorage.setItem('wishlist', JSON.stringify(wishlist));
@@ -43,10 +92,12 @@ export const CartProvider = ({ children }) => {
       }
       return [...prevCart, { ...product, quantity }];
     });
+    syncServer(() => cartAPI.add(product.id, quantity));
   };
 
   const removeFromCart = (productId) => {
     setCart(prevCart => prevCart.filter(item => item.id !== productId));
+    syncServer(() => cartAPI.remove(productId));
   };
 
   const updateQuantity = (productId, quantity) => {
@@ -59,10 +110,12 @@ export const CartProvider = ({ children }) => {
         item.id === productId ? { ...item, quantity } : item
       )
     );
+    syncServer(() => cartAPI.update(productId, quantity));
   };
 
   const clearCart = () => {
     setCart([]);
+    syncServer(() => cartAPI.clear());
   };
 
   const addToWishlist = (product) => {
@@ -80,9 +80,6 @@ const CheckoutPage = () => {
         // Cash on Delivery - Direct order creation
         const orderItems = cart.map(item => ({
           productId: item.id,
-          name: item.name,
-          image: item.image,
-          price: item.price,
           quantity: item.quantity
         }));
 
@@ -146,9 +143,6 @@ const CheckoutPage = () => {
               // Step 5: Create order in database
               const orderItems = cart.map(item => ({
                 productId: item.id,
-                name: item.name,
-                image: item.image,
-                price: item.price,
                 quantity: item.quantity
               }));
 
@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
 import { banners } from '../mockData';
-import { productsAPI } from '../services/api';
+import { homeAPI } from '../services/api';
 import { Star, TrendingUp, Zap } from 'lucide-react';
 import { Button } from '../components/ui/button';
 import { Card } from '../components/ui/card';
@@ -14,14 +14,15 @@ import {
 } from '../components/ui/carousel';
 
 const HomePage = () => {
-  const [products, setProducts] = useState([]);
+  const [sections, setSections] = useState([]);
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
     const fetchProducts = async () => {
       try {
-        const response = await productsAPI.getAll();
-        setProducts(response.data);
+        // Every category with its top-rated and top-discounted products
+        const response = await homeAPI.get({ sort: 'rating,discount', limit: 6 });
+        setSections(response.data);
       } catch (error) {
         console.error('Error fetching products:', error);
       } finally {
@@ -32,9 +33,16 @@ const HomePage = () => {
     fetchProducts();
   }, []);
 
-  const topDeals = products.filter(p => p.discount >= 40).slice(0, 6);
-  const electronics = products.filter(p => p.categoryId === 1).slice(0, 6);
-  const fashion = products.filter(p => p.categoryId === 2).slice(0, 6);
+  const categoryProducts = (categoryId) =>
+    sections.find(section => section.id === categoryId)?.products.rating || [];
+
+  const topDeals = sections
+    .flatMap(section => section.products.discount)
+    .filter(p => p.discount >= 40)
+    .sort((a, b) => b.discount - a.discount)
+    .slice(0, 6);
+  const electronics = categoryProducts(1);
+  const fashion = categoryProducts(2);
 
   if (loading) {
     return (
@@ -26,6 +26,12 @@ export const productsAPI = {
   getById: (id) => api.get(`/products/${id}`),
   getByCategory: (categoryId) => api.get(`/products/category/${categoryId}`),
   search: (query) => api.get(`/products/search?q=${query}`),
+  getBatch: (ids) => api.post('/products/batch', { ids }),
+};
+
+// Home API
+export const homeAPI = {
+  get: (params) => api.get('/home', { params }),
 };
 
 // Categories API
@@ -40,6 +46,16 @@ export const authAPI = {
   getMe: () => api.get('/auth/me'),
 };
 
+// Cart API
+export const cartAPI = {
+  get: () => api.get('/cart'),
+  add: (productId, quantity = 1) => api.post('/cart', { productId, quantity }),
+  update: (productId, quantity) => api.put(`/cart/${productId}`, { quantity }),
+  remove: (productId) => api.delete(`/cart/${productId}`),
+  merge: (items) => api.post('/cart/merge', { items }),
+  clear: () => api.delete('/cart'),
+};
+
 // Orders API
 export const ordersAPI = {
   create: (data) => api.post('/orders', data),
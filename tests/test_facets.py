@@ -0,0 +1,29 @@
+from facets import ALL_SCOPE, category_scope, facet_changes, facet_increments
+
+
+def product(**fields):
+    return dict({"categoryId": 1, "price": 800, "rating": 4.2, "discount": 15, "fastDelivery": True}, **fields)
+
+
+def test_stored_keys_have_no_dots():
+    assert all(path.count(".") <= 1 for path in facet_increments(product(rating=4.7)))
+    assert facet_increments(product())["rating.4-4_5"] == 1
+
+
+def test_new_product_adds_to_both_scopes():
+    changes = facet_changes([(None, product())])
+    for scope in (ALL_SCOPE, category_scope(1)):
+        assert changes[scope]["total"] == 1
+        assert changes[scope]["price.500-1000"] == 1
+
+
+def test_unchanged_product_is_a_no_op():
+    assert facet_changes([(product(), product(name="Renamed"))]) == {}
+
+
+def test_moved_product_shifts_buckets_and_categories():
+    changes = facet_changes([(product(), product(categoryId=2, price=1200))])
+    assert changes[ALL_SCOPE] == {"price.500-1000": -1, "price.1000-5000": 1}
+    assert changes[category_scope(1)]["total"] == -1
+    assert changes[category_scope(2)]["total"] == 1
+    assert changes[category_scope(2)]["price.1000-5000"] == 1
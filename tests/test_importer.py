@@ -0,0 +1,37 @@
+import json
+
+from importer import dedupe_rows, iter_ndjson, stable_product_id, validate_rows
+
+
+def line(**fields):
+    row = {
+        "name": "Foo", "category": "Books", "categoryId": 1, "price": 100, "originalPrice": 100,
+        "discount": 0, "rating": 4.0, "reviews": 1, "image": "foo.jpg", "description": "A foo",
+    }
+    row.update(fields)
+    return json.dumps(row)
+
+
+def test_names_differing_in_case_or_spacing_are_separate_products():
+    errors = []
+    rows = validate_rows(list(iter_ndjson([line(name="Foo"), line(name="foo ")], errors)), errors)
+    docs = dedupe_rows(rows, errors)
+    assert [doc["name"] for doc in docs] == ["Foo", "foo "]
+    assert stable_product_id(docs[0]) != stable_product_id(docs[1])
+    assert errors == []
+
+
+def test_superseded_rows_are_reported():
+    errors = []
+    rows = validate_rows(list(iter_ndjson([line(price=1), line(price=2)], errors)), errors)
+    docs = dedupe_rows(rows, errors)
+    assert [doc["price"] for doc in docs] == [2]
+    assert errors == [{"line": 1, "error": "Superseded by line 2 for the same product"}]
+
+
+def test_unparsable_lines_are_still_rows():
+    errors = []
+    rows = list(iter_ndjson([line(), "not json", "[1]", ""], errors))
+    assert [line_number for line_number, _ in rows] == [1, 2, 3]
+    assert [error["line"] for error in errors] == [2, 3]
+    assert len(validate_rows(rows, errors)) == 1
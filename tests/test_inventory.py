@@ -0,0 +1,116 @@
+import asyncio
+import os
+import uuid
+
+import pytest
+
+motor_asyncio = pytest.importorskip("motor.motor_asyncio")
+pymongo_errors = pytest.importorskip("pymongo.errors")
+
+from inventory import Inventory, OutOfStockError, reserved_quantities
+
+MONGO_URL = os.environ.get("MONGO_URL", "mongodb://localhost:27017")
+
+
+def run(test):
+    """Run a coroutine against a scratch database that is dropped afterwards"""
+    async def wrapper():
+        client = motor_asyncio.AsyncIOMotorClient(MONGO_URL, serverSelectionTimeoutMS=1000)
+        try:
+            await client.admin.command("ping")
+        except pymongo_errors.PyMongoError:
+            pytest.skip(f"no mongod at {MONGO_URL}")
+        name = f"test_inventory_{uuid.uuid4().hex[:8]}"
+        db = client[name]
+        try:
+            await test(Inventory(db.inventory, db.reservations))
+        finally:
+            await client.drop_database(name)
+            client.close()
+    asyncio.run(wrapper())
+
+
+def test_line_larger_than_any_shard_is_split_across_shards():
+    async def test(inventory):
+        await inventory.set_stock("hot", 3, shards=3)
+        reservation = await inventory.reserve("user", [("hot", 2)])
+        assert reserved_quantities(reservation) == {"hot": 2}
+        assert len(reservation["allocations"]) == 2
+        assert await inventory.available("hot") == 1
+
+        await inventory.release(reservation["id"], "user")
+        assert await inventory.available("hot") == 3
+    run(test)
+
+
+def test_all_scattered_units_can_be_sold():
+    async def test(inventory):
+        await inventory.set_stock("hot", 5, shards=4)
+        await inventory.reserve("user", [("hot", 5)])
+        assert await inventory.available("hot") == 0
+    run(test)
+
+
+def test_short_split_returns_partial_takes():
+    async def test(inventory):
+        await inventory.set_stock("hot", 3, shards=3)
+        with pytest.raises(OutOfStockError):
+            await inventory.reserve("user", [("hot", 4)])
+        assert await inventory.available("hot") == 3
+    run(test)
+
+
+def test_failed_line_returns_earlier_lines():
+    async def test(inventory):
+        await inventory.set_stock("a", 2, shards=2)
+        await inventory.set_stock("b", 1)
+        with pytest.raises(OutOfStockError):
+            await inventory.reserve("user", [("a", 2), ("b", 2)])
+        assert await inventory.available("a") == 2
+        assert await inventory.available("b") == 1
+    run(test)
+
+
+def test_untracked_products_are_always_available():
+    async def test(inventory):
+        reservation = await inventory.reserve("user", [("untracked", 50)])
+        assert reserved_quantities(reservation) == {"untracked": 50}
+        assert await inventory.available("untracked") is None
+    run(test)
+
+
+def test_reshard_by_another_worker_is_seen():
+    async def test(inventory):
+        other = Inventory(inventory.stock, inventory.reservations)
+        await inventory.set_stock("hot", 1)
+        await inventory.reserve("user", [("hot", 1)])
+        await other.set_stock("hot", 3, shards=3)
+        reservation = await inventory.reserve("user", [("hot", 2)])
+        assert len(reservation["allocations"]) == 2
+    run(test)
+
+
+def test_set_stock_accounts_for_held_units():
+    async def test(inventory):
+        await inventory.set_stock("hot", 5)
+        reservation = await inventory.reserve("user", [("hot", 3)])
+        await inventory.set_stock("hot", 4, shards=2)
+        assert await inventory.available("hot") == 1
+
+        await inventory.release(reservation["id"], "user")
+        assert await inventory.available("hot") == 4
+    run(test)
+
+
+def test_set_stock_below_held_units_blocks_sales():
+    async def test(inventory):
+        await inventory.set_stock("hot", 3, shards=3)
+        reservation = await inventory.reserve("user", [("hot", 3)])
+        await inventory.set_stock("hot", 2)
+        assert await inventory.available("hot") == 0
+        with pytest.raises(OutOfStockError):
+            await inventory.reserve("user", [("hot", 1)])
+
+        await inventory.release(reservation["id"], "user")
+        assert await inventory.available("hot") == 2
+    run(test)
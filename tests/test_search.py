@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+
+from search import IndexRefresher, SearchIndex, stem, tokenize
+
+
+@pytest.fixture
+def index():
+    index = SearchIndex()
+    index.add_many([
+        {"_id": "shoes", "name": "Running Shoes", "category": "Sports", "description": "Lightweight trainers"},
+        {"_id": "aa", "name": "AA Batteries", "category": "Electronics", "description": "Pack of 8"},
+        {"_id": "bike", "name": "Speed Bike", "category": "Sports", "description": "21 gears"},
+        {"_id": "watch", "name": "Smart Watches", "category": "Electronics", "description": "Fitness tracking"},
+        {"_id": "cafe", "name": "Café Espresso Maker", "category": "Appliances", "description": "15 bar pump"},
+    ])
+    return index
+
+
+@pytest.mark.parametrize("plural, singular", [
+    ("watches", "watch"),
+    ("brushes", "brush"),
+    ("boxes", "box"),
+    ("glasses", "glass"),
+    ("batteries", "battery"),
+    ("shoes", "shoe"),
+])
+def test_plurals_stem_like_singulars(plural, singular):
+    assert stem(plural) == stem(singular)
+
+
+def test_stem_leaves_short_tokens_and_numbers():
+    assert stem("bus") == "bus"
+    assert stem("1000") == "1000"
+
+
+def test_tokenize_normalizes_accents_and_case():
+    assert tokenize("Café RUNNING") == ["cafe", "run"]
+    assert tokenize(None) == []
+
+
+@pytest.mark.parametrize("word, key", [
+    ("running", "shoes"),
+    ("batteries", "aa"),
+    ("speed", "bike"),
+])
+def test_every_keystroke_keeps_matching(index, word, key):
+    for end in range(2, len(word) + 1):
+        assert index.search(word[:end])[0] == key, word[:end]
+
+
+def test_word_order_does_not_matter(index):
+    assert index.search("smart watch") == ["watch"]
+    assert index.search("watch smart") == ["watch"]
+    assert index.search("watches") == ["watch"]
+
+
+def test_all_terms_must_match(index):
+    assert index.search("running batteries") == []
+    assert index.search("sports") == ["bike", "shoes"]
+
+
+def test_single_character_prefix_is_not_expanded(index):
+    assert index.search("r") == []
+
+
+def test_remove_drops_prefix_matches(index):
+    index.remove("shoes")
+    assert index.search("runn") == []
+    assert index.search("running") == []
+
+
+def test_replace_swaps_in_new_postings(index):
+    fresh = SearchIndex()
+    fresh.add({"_id": "new", "name": "Running Jacket"})
+    index.replace(fresh)
+    assert index.search("runni") == ["new"]
+    assert index.search("speed") == []
+
+
+def test_refresher_never_overlaps_and_reruns_once_after_requests():
+    running = 0
+    calls = []
+
+    async def rebuild():
+        nonlocal running
+        running += 1
+        assert running == 1
+        calls.append(len(calls))
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    async def main():
+        refresher = IndexRefresher(rebuild)
+        first = refresher.request()
+        await asyncio.sleep(0)
+        # Three requests during the first rebuild coalesce into one more
+        for _ in range(3):
+            assert refresher.request() is first
+        await first
+        assert calls == [0, 1]
+
+        await refresher.request()
+        assert calls == [0, 1, 2]
+
+    asyncio.run(main())